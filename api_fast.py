@@ -21,6 +21,13 @@ import csv
 from io import StringIO
 from enum import Enum
 from datetime import date
+import sys
+
+# Share the backend's login throttle rather than keeping a second copy here
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from app.auth.login_throttle import (  # noqa: E402
+    email_login_limiter, enforce_login_rate_limit, ip_login_limiter, record_failed_login
+)
 
 # Configuration
 SECRET_KEY = "your-secret-key"
@@ -274,10 +281,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
 
 # Routes
 @app.post("/auth/login")
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
+    enforce_login_rate_limit(request, login_data.email)
     user = db.query(User).filter(User.email == login_data.email).first()
     
     if not user or not user.verify_password(login_data.password):
+        record_failed_login(login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -313,6 +322,12 @@ async def get_users(current_user: User = Depends(get_current_user), db: Session
         raise HTTPException(status_code=403, detail="Not authorized")
     return db.query(User).all()
 
+@app.get("/admin/login-rate-limit")
+async def get_login_rate_limit_stats(current_user: User = Depends(get_current_user)):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return {"ip": ip_login_limiter.stats(), "email": email_login_limiter.stats()}
+
 @app.post("/tasks", response_model=TaskOut)
 async def create_task(
     task: TaskCreate,
@@ -0,0 +1,30 @@
+"""Add (created_at, id) indexes for keyset pagination
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+KEYSET_INDEXES = [
+    ('lp_details', 'lp_id'),
+    ('lp_drawdowns', 'drawdown_id'),
+    ('compliance_records', 'record_id'),
+]
+
+
+def upgrade():
+    for table, pk in KEYSET_INDEXES:
+        op.create_index(f'ix_{table}_created_at_{pk}', table, ['created_at', pk], unique=False)
+
+
+def downgrade():
+    for table, pk in reversed(KEYSET_INDEXES):
+        op.drop_index(f'ix_{table}_created_at_{pk}', table_name=table)
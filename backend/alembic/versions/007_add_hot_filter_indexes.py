@@ -0,0 +1,43 @@
+"""Add composite and partial indexes for the hot list and stats filters
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+HOT_FILTER_INDEXES = [
+    ('ix_compliance_tasks_state_deadline', 'compliance_tasks', ['state', 'deadline'], None),
+    ('ix_compliance_tasks_open_deadline', 'compliance_tasks', ['deadline'], "state <> 'Completed'"),
+    ('ix_compliance_tasks_assignee_id', 'compliance_tasks', ['assignee_id'], None),
+    ('ix_lp_drawdowns_lp_id_created_at', 'lp_drawdowns', ['lp_id', 'created_at', 'drawdown_id'], None),
+    ('ix_lp_drawdowns_status_due_date', 'lp_drawdowns', ['payment_status', 'payment_due_date'], None),
+    ('ix_lp_drawdowns_unpaid_due_date', 'lp_drawdowns', ['payment_due_date'], "payment_status <> 'Received'"),
+    ('ix_compliance_records_status_created_at', 'compliance_records', ['compliance_status', 'created_at', 'record_id'], None),
+]
+
+
+def upgrade():
+    # Build concurrently so large tables stay writable during the migration
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in HOT_FILTER_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(HOT_FILTER_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
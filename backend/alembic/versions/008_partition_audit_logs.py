@@ -0,0 +1,82 @@
+"""Partition audit_logs by month on timestamp
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.audit_partitions import (
+    AUDIT_PARTITION_MONTHS_AHEAD, DEFAULT_PARTITION, add_months, month_start, partition_ddl
+)
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+AUDIT_INDEXES = ['timestamp', 'user_id', 'activity']
+
+
+def upgrade():
+    op.rename_table('audit_logs', 'audit_logs_unpartitioned')
+    for column in AUDIT_INDEXES:
+        op.drop_index(f'ix_audit_logs_{column}', table_name='audit_logs_unpartitioned')
+    op.execute("ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            log_id UUID NOT NULL DEFAULT uuid_generate_v4(),
+            user_id UUID REFERENCES users (user_id),
+            activity VARCHAR NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            details TEXT,
+            PRIMARY KEY (log_id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    # Created on the parent, so every partition gets its own copy
+    for column in AUDIT_INDEXES:
+        op.create_index(f'ix_audit_logs_{column}', 'audit_logs', [column], unique=False)
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF audit_logs DEFAULT")
+
+    # One partition per month that already has rows, through the months ahead
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM audit_logs_unpartitioned")).scalar()
+    current = month_start(date.today())
+    month = month_start(oldest.date()) if oldest else current
+    while month <= add_months(current, AUDIT_PARTITION_MONTHS_AHEAD):
+        op.execute(partition_ddl(month))
+        month = add_months(month, 1)
+
+    op.execute("""
+        INSERT INTO audit_logs (log_id, user_id, activity, timestamp, details)
+        SELECT log_id, user_id, activity, timestamp, details FROM audit_logs_unpartitioned
+    """)
+    op.drop_table('audit_logs_unpartitioned')
+
+
+def downgrade():
+    op.rename_table('audit_logs', 'audit_logs_partitioned')
+    for column in AUDIT_INDEXES:
+        op.drop_index(f'ix_audit_logs_{column}', table_name='audit_logs_partitioned')
+    op.create_table(
+        'audit_logs',
+        sa.Column('log_id', postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text('uuid_generate_v4()')),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.user_id'), nullable=True),
+        sa.Column('activity', sa.String(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('details', sa.Text(), nullable=True),
+    )
+    for column in AUDIT_INDEXES:
+        op.create_index(f'ix_audit_logs_{column}', 'audit_logs', [column], unique=False)
+    op.execute("""
+        INSERT INTO audit_logs (log_id, user_id, activity, timestamp, details)
+        SELECT log_id, user_id, activity, timestamp, details FROM audit_logs_partitioned
+    """)
+    # Dropping the parent drops every partition with it
+    op.drop_table('audit_logs_partitioned')
@@ -0,0 +1,38 @@
+"""Add compliance_stats counters table
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'compliance_stats',
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('compliance_type', sa.String(), nullable=False),
+        sa.Column('compliance_status', sa.String(), nullable=False),
+        sa.Column('record_count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('entity_type', 'compliance_type', 'compliance_status')
+    )
+    # Seed the counters; block record writes until the migration commits
+    # so none are missed between the count and the API going live
+    op.execute("LOCK TABLE compliance_records IN SHARE MODE")
+    op.execute(
+        "INSERT INTO compliance_stats (entity_type, compliance_type, compliance_status, record_count) "
+        "SELECT entity_type, compliance_type, compliance_status, count(*) "
+        "FROM compliance_records GROUP BY entity_type, compliance_type, compliance_status"
+    )
+
+
+def downgrade():
+    op.drop_table('compliance_stats')
@@ -0,0 +1,39 @@
+"""Add partial indexes for the overdue sweeper
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+# Each index holds only the rows the sweeper has not moved yet, so a
+# sweep stays cheap however many rows are already overdue
+SWEEP_INDEXES = [
+    ('ix_compliance_tasks_sweep_deadline', 'compliance_tasks', ['deadline'], "state NOT IN ('Completed', 'Overdue')"),
+    ('ix_lp_drawdowns_sweep_due_date', 'lp_drawdowns', ['payment_due_date'], "payment_status NOT IN ('Received', 'Overdue')"),
+    ('ix_compliance_records_pending_due_date', 'compliance_records', ['due_date'], "compliance_status = 'Pending Review'"),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in SWEEP_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where)
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(SWEEP_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""Index compliance_tasks.dependent_task_id for dependency graph queries
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Recursive CTEs walking from a task to the tasks that depend on it
+    # join on dependent_task_id at every level
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_compliance_tasks_dependent_task_id', 'compliance_tasks', ['dependent_task_id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_compliance_tasks_dependent_task_id', table_name='compliance_tasks', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Add series columns for materialized recurring task occurrences
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-16 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable columns without a default only touch the catalog
+    op.add_column('compliance_tasks', sa.Column('series_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('compliance_tasks', sa.Column('occurrence_date', sa.Date(), nullable=True))
+    op.create_foreign_key(
+        'compliance_tasks_series_id_fkey', 'compliance_tasks', 'compliance_tasks',
+        ['series_id'], ['compliance_task_id']
+    )
+    # The materializer's ON CONFLICT target; rows outside a series have
+    # NULL keys and never conflict
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_compliance_tasks_series_occurrence', 'compliance_tasks', ['series_id', 'occurrence_date'],
+            unique=True, postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_compliance_tasks_series_occurrence', table_name='compliance_tasks', postgresql_concurrently=True)
+    op.drop_constraint('compliance_tasks_series_id_fkey', 'compliance_tasks', type_='foreignkey')
+    op.drop_column('compliance_tasks', 'occurrence_date')
+    op.drop_column('compliance_tasks', 'series_id')
@@ -0,0 +1,135 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, Dict, Optional
+from datetime import datetime
+from enum import Enum
+from io import StringIO
+import csv
+import json
+import os
+import uuid
+
+from app.auth.permissions import Permission, require_permission
+from app.database.replicas import get_read_db
+from app.models.audit_log import AuditLog
+from app.schemas.audit_log import AuditLogPage
+from app.utils.pagination import keyset_page
+
+router = APIRouter()
+
+# Rows fetched from the server-side cursor per round trip during export
+AUDIT_EXPORT_CHUNK_ROWS = int(os.getenv("AUDIT_EXPORT_CHUNK_ROWS", "1000"))
+
+EXPORT_COLUMNS = ("log_id", "user_id", "activity", "timestamp", "details")
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+def filtered_audit_logs(
+    query,
+    user_id: Optional[uuid.UUID],
+    activity: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime]
+):
+    # Bounds on timestamp also let Postgres prune monthly partitions
+    if user_id:
+        query = query.where(AuditLog.user_id == user_id)
+    if activity:
+        query = query.where(AuditLog.activity == activity)
+    if start:
+        query = query.where(AuditLog.timestamp >= start)
+    if end:
+        query = query.where(AuditLog.timestamp < end)
+    return query
+
+
+@router.get("/", response_model=AuditLogPage)
+async def list_audit_logs(
+    user_id: Optional[uuid.UUID] = None,
+    activity: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound on timestamp"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound on timestamp"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.AUDIT_LOG_READ)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get audit log entries, newest first, with optional filters and cursor pagination.
+    """
+    query = filtered_audit_logs(select(AuditLog), user_id, activity, start, end)
+    page = await keyset_page(
+        db, query, AuditLog.timestamp, AuditLog.log_id,
+        limit=limit, cursor=cursor, descending=True
+    )
+    return AuditLogPage(entries=page.items, next_cursor=page.next_cursor, prev_cursor=page.prev_cursor)
+
+
+def _jsonable(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps({column: _jsonable(value) for column, value in zip(EXPORT_COLUMNS, row)}) + "\n"
+        for row in rows
+    )
+
+
+def _csv_chunk(rows, header: bool = False) -> str:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+async def _stream_export(engine, query, export_format: ExportFormat) -> AsyncIterator[str]:
+    # A dedicated connection keeps the server-side cursor open for the whole
+    # response, independently of when the request's session is closed
+    async with engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=AUDIT_EXPORT_CHUNK_ROWS))
+        if export_format == ExportFormat.CSV:
+            yield _csv_chunk([], header=True)
+        async for rows in result.partitions(AUDIT_EXPORT_CHUNK_ROWS):
+            yield _csv_chunk(rows) if export_format == ExportFormat.CSV else _ndjson_chunk(rows)
+
+
+@router.get("/export")
+async def export_audit_logs(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    user_id: Optional[uuid.UUID] = None,
+    activity: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound on timestamp"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound on timestamp"),
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.AUDIT_LOG_READ)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Stream every matching audit log entry, oldest first, as NDJSON or CSV.
+
+    Rows are read through a server-side cursor in chunks, so memory use does
+    not grow with the size of the export.
+    """
+    columns = [getattr(AuditLog, column) for column in EXPORT_COLUMNS]
+    query = filtered_audit_logs(select(*columns), user_id, activity, start, end)
+    query = query.order_by(AuditLog.timestamp, AuditLog.log_id)
+
+    media_type = "text/csv" if export_format == ExportFormat.CSV else "application/x-ndjson"
+    filename = f"audit_logs.{export_format.value}"
+    return StreamingResponse(
+        _stream_export(db.bind, query, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,42 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
-from app.database.base import get_db
-from app.models.compliance_records import ComplianceRecord, EntityType, ComplianceStatus
+from app.database.base import get_db, get_async_db
+from app.database.replicas import get_read_db
+from app.models.compliance_records import ComplianceRecord, EntityType
 from app.schemas.compliance import (
     ComplianceRecordCreate, ComplianceRecordUpdate, ComplianceRecordResponse,
-    ComplianceRecordList, EntityTypeEnum, ComplianceStatusEnum
+    ComplianceRecordList, EntityTypeEnum, ComplianceStatusEnum, StatsGroupByEnum,
+    ComplianceImportResult, ImportFormat,
+    ComplianceBulkStatusUpdate, ComplianceBulkStatusResult
 )
 from app.auth.security import get_current_user
-from app.utils.audit import log_activity
+from app.auth.identity import resolve_user_id
+from app.auth.permissions import Permission, require_permission
+from app.utils.audit import stage_activity
+from app.utils.pagination import keyset_page, keyset_query
+from app.utils.etags import check_etag, page_validator
+from app.utils.compliance_stats import (
+    fetch_status_counts, build_stats, move_count, record_key, adjust_counts, compliance_stats_cache
+)
+from app.utils.compliance_import import import_records, spool_request_body
 import uuid
-from sqlalchemy import func
+from sqlalchemy import func, select, update
 
 router = APIRouter()
 
 @router.post("/records", response_model=ComplianceRecordResponse, status_code=status.HTTP_201_CREATED)
 async def create_compliance_record(
     record_data: ComplianceRecordCreate,
-    current_user: Dict[str, Any] = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.COMPLIANCE_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Create a new compliance record.
     """
-    # Check if user has appropriate role
-    if current_user.get("role") not in ["Fund Manager", "Compliance Officer", "Fund Admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"User does not have one of the required roles: Fund Manager, Compliance Officer, Fund Admin"
-        )
-    
     try:
-        # Print the current_user dictionary to see what keys are available
-        print(f"Current user: {current_user}")
-        
-        # Use 'sub' instead of 'user_id' and provide a default UUID if not found
-        user_id = current_user.get("sub", "00000000-0000-0000-0000-000000000000")
-        print(f"User ID: {user_id}")
+        user_id = resolve_user_id(db, current_user)
         
         # Create new compliance record
         new_record = ComplianceRecord(
@@ -46,23 +47,20 @@ async def create_compliance_record(
             compliance_status=record_data.compliance_status.value,
             due_date=record_data.due_date,
             comments=record_data.comments,
+            updated_by=user_id,
         )
         
         db.add(new_record)
+        move_count(db, None, record_key(new_record))
+        stage_activity(
+            db=db, 
+            activity="compliance_record_created", 
+            user_id=user_id, 
+            details=f"Created compliance record: {record_data.compliance_type} for {record_data.entity_type.value}"
+        )
         db.commit()
         db.refresh(new_record)
         
-        # Log the activity
-        try:
-            log_activity(
-                db=db, 
-                activity="compliance_record_created", 
-                details=f"Created compliance record: {record_data.compliance_type} for {record_data.entity_type.value}"
-            )
-        except Exception as e:
-            print(f"Error logging activity: {str(e)}")
-            # Continue even if logging fails
-        
         return new_record
     except Exception as e:
         db.rollback()
@@ -72,45 +70,195 @@ async def create_compliance_record(
             detail=f"Error creating compliance record: {str(e)}"
         )
 
+@router.post("/records/import", response_model=ComplianceImportResult)
+async def import_compliance_records(
+    request: Request,
+    import_format: ImportFormat = Query(ImportFormat.CSV, alias="format"),
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.COMPLIANCE_WRITE)),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-create compliance records from a CSV (with header) or NDJSON request body.
+
+    Valid rows are imported and invalid ones are reported by row number;
+    one audit entry summarises the import.
+    """
+    spool = await spool_request_body(request)
+    try:
+        user_id = resolve_user_id(db, current_user)
+        result = await run_in_threadpool(import_records, db, spool, import_format, user_id)
+        stage_activity(
+            db=db,
+            activity="compliance_records_imported",
+            user_id=user_id,
+            details=f"Imported {result.imported} compliance records ({result.rejected} rejected) from {import_format.value}"
+        )
+        db.commit()
+        # Bulk inserts bypass the ORM events that normally drop cached stats;
+        # cleared only once committed so no reader re-caches the old counts
+        compliance_stats_cache.clear()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        spool.close()
+    return result
+
+@router.post("/records/bulk-status", response_model=ComplianceBulkStatusResult)
+async def bulk_update_compliance_status(
+    body: ComplianceBulkStatusUpdate,
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.COMPLIANCE_WRITE)),
+    db: Session = Depends(get_db)
+):
+    """
+    Set the status (and optionally the comments) of every record matching an id list and/or a filter.
+
+    Runs as one UPDATE ... RETURNING; one audit entry records the change.
+    """
+    criteria = []
+    if body.record_ids is not None:
+        criteria.append(ComplianceRecord.record_id.in_(body.record_ids))
+    if body.filter:
+        f = body.filter
+        if f.entity_type:
+            criteria.append(ComplianceRecord.entity_type == f.entity_type.value)
+        if f.lp_id:
+            criteria.append(ComplianceRecord.lp_id == f.lp_id)
+        if f.compliance_type:
+            criteria.append(ComplianceRecord.compliance_type == f.compliance_type)
+        if f.compliance_status:
+            criteria.append(ComplianceRecord.compliance_status == f.compliance_status.value)
+        if f.due_before:
+            criteria.append(ComplianceRecord.due_date < f.due_before)
+    if not criteria:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide record_ids or at least one filter field"
+        )
+
+    user_id = resolve_user_id(db, current_user)
+    new_status = body.compliance_status.value
+    values = {
+        "compliance_status": new_status,
+        "updated_by": user_id,
+        "last_updated": func.now(),
+        "updated_at": func.now(),
+    }
+    if body.comments is not None:
+        values["comments"] = body.comments
+
+    # Lock the targets first so the previous statuses used for the
+    # counters are the ones actually overwritten
+    targets = select(
+        ComplianceRecord.record_id,
+        ComplianceRecord.entity_type,
+        ComplianceRecord.compliance_type,
+        ComplianceRecord.compliance_status.label("old_status")
+    ).where(*criteria).with_for_update().cte("targets")
+    updated = update(ComplianceRecord).where(
+        ComplianceRecord.record_id == targets.c.record_id
+    ).values(**values).returning(
+        targets.c.entity_type, targets.c.compliance_type, targets.c.old_status
+    ).cte("updated")
+    moved = db.execute(select(
+        updated.c.entity_type, updated.c.compliance_type, updated.c.old_status, func.count()
+    ).group_by(updated.c.entity_type, updated.c.compliance_type, updated.c.old_status)).all()
+
+    changes: Dict[tuple, int] = {}
+    total = 0
+    for entity_type, compliance_type, old_status, count in moved:
+        total += count
+        old_key = (entity_type, compliance_type, old_status)
+        new_key = (entity_type, compliance_type, new_status)
+        changes[old_key] = changes.get(old_key, 0) - count
+        changes[new_key] = changes.get(new_key, 0) + count
+    adjust_counts(db, changes)
+
+    stage_activity(
+        db=db,
+        activity="compliance_records_bulk_status",
+        user_id=user_id,
+        details=f"Set {total} compliance records to {new_status}"
+    )
+    db.commit()
+    # A Core UPDATE does not fire the ComplianceRecord mapper events
+    compliance_stats_cache.clear()
+    return ComplianceBulkStatusResult(updated=total)
+
 @router.get("/records", response_model=ComplianceRecordList)
 async def get_compliance_records(
+    request: Request,
+    response: Response,
     entity_type: Optional[EntityTypeEnum] = None,
     lp_id: Optional[uuid.UUID] = None,
     compliance_status: Optional[ComplianceStatusEnum] = None,
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    limit: int = Query(100, ge=1, le=1000),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get compliance records with optional filtering.
+    Get compliance records with optional filtering, oldest first, with cursor pagination.
+
+    Supports If-None-Match.
     """
-    query = db.query(ComplianceRecord)
+    query = select(ComplianceRecord)
     
     if entity_type:
-        query = query.filter(ComplianceRecord.entity_type == entity_type.value)
+        query = query.where(ComplianceRecord.entity_type == entity_type.value)
     
     if lp_id:
-        query = query.filter(ComplianceRecord.lp_id == lp_id)
+        query = query.where(ComplianceRecord.lp_id == lp_id)
     
     if compliance_status:
-        query = query.filter(ComplianceRecord.compliance_status == compliance_status.value)
+        query = query.where(ComplianceRecord.compliance_status == compliance_status.value)
     
-    total = query.count()
-    records = query.offset(skip).limit(limit).all()
+    # The body carries the total, so it is part of the tag; the rest is
+    # validated over the requested page only
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    page_query = keyset_query(
+        query, ComplianceRecord.created_at, ComplianceRecord.record_id, limit=limit, cursor=cursor, skip=skip
+    )
+    not_modified = await check_etag(
+        request, response, db,
+        page_validator(page_query, ComplianceRecord.updated_at, ComplianceRecord.record_id),
+        request.url.query, total
+    )
+    if not_modified:
+        return not_modified
     
-    return ComplianceRecordList(records=records, total=total)
+    page = await keyset_page(
+        db, query, ComplianceRecord.created_at, ComplianceRecord.record_id,
+        limit=limit, cursor=cursor, skip=skip
+    )
+    
+    return ComplianceRecordList(
+        records=page.items,
+        total=total,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor
+    )
 
 @router.get("/records/{record_id}", response_model=ComplianceRecordResponse)
 async def get_compliance_record(
     record_id: uuid.UUID,
+    request: Request,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific compliance record by ID.
+    Get a specific compliance record by ID. Supports If-None-Match.
     """
-    record = db.query(ComplianceRecord).filter(ComplianceRecord.record_id == record_id).first()
+    not_modified = await check_etag(
+        request, response, db,
+        select(ComplianceRecord.updated_at).where(ComplianceRecord.record_id == record_id),
+        record_id
+    )
+    if not_modified:
+        return not_modified
+    record = await db.get(ComplianceRecord, record_id)
     if not record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,26 +270,23 @@ async def get_compliance_record(
 async def update_compliance_record(
     record_id: uuid.UUID,
     record_data: ComplianceRecordUpdate,
-    current_user: Dict[str, Any] = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.COMPLIANCE_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Update an existing compliance record.
     """
-    # Check if user has appropriate role
-    if current_user.get("role") not in ["Fund Manager", "Compliance Officer", "Fund Admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"User does not have one of the required roles: Fund Manager, Compliance Officer, Fund Admin"
-        )
-    
-    record = db.query(ComplianceRecord).filter(ComplianceRecord.record_id == record_id).first()
+    # Locked so a concurrent update cannot move the counters out of the
+    # same stale bucket
+    record = db.query(ComplianceRecord).filter(ComplianceRecord.record_id == record_id).with_for_update().first()
     if not record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Compliance record not found"
         )
     
+    old_key = record_key(record)
+
     # Update record data
     update_data = record_data.model_dump(exclude_unset=True)
     
@@ -152,48 +297,32 @@ async def update_compliance_record(
         setattr(record, key, value)
     
     # Update the updated_by field
-    record.updated_by = uuid.UUID(current_user["user_id"])
+    user_id = resolve_user_id(db, current_user)
+    record.updated_by = user_id
     
+    move_count(db, old_key, record_key(record))
+    stage_activity(
+        db=db, 
+        activity="compliance_record_updated", 
+        user_id=user_id, 
+        details=f"Updated compliance record: {record_id}"
+    )
     db.commit()
     db.refresh(record)
     
-    # Log the activity
-    try:
-        # Convert user_id to UUID or use a default UUID if conversion fails
-        try:
-            user_uuid = uuid.UUID(current_user["sub"])
-        except (KeyError, ValueError):
-            user_uuid = uuid.UUID("00000000-0000-0000-0000-000000000000")
-            
-        log_activity(
-            db=db, 
-            activity="compliance_record_updated", 
-            user_id=user_uuid, 
-            details=f"Updated compliance record: {record_id}"
-        )
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
-        # Continue even if logging fails
-    
     return record
 
 @router.delete("/records/{record_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_compliance_record(
     record_id: uuid.UUID,
-    current_user: Dict[str, Any] = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.COMPLIANCE_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Delete a compliance record.
     """
-    # Check if user has appropriate role
-    if current_user.get("role") not in ["Fund Manager", "Compliance Officer", "Fund Admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"User does not have one of the required roles: Fund Manager, Compliance Officer, Fund Admin"
-        )
-    
-    record = db.query(ComplianceRecord).filter(ComplianceRecord.record_id == record_id).first()
+    # Locked so a concurrent update or delete waits; a racing delete then finds no row
+    record = db.query(ComplianceRecord).filter(ComplianceRecord.record_id == record_id).with_for_update().first()
     if not record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -201,53 +330,26 @@ async def delete_compliance_record(
         )
     
     db.delete(record)
+    move_count(db, record_key(record), None)
+    stage_activity(
+        db=db, 
+        activity="compliance_record_deleted", 
+        user_id=resolve_user_id(db, current_user), 
+        details=f"Deleted compliance record: {record_id}"
+    )
     db.commit()
     
-    # Log the activity
-    try:
-        # Convert user_id to UUID or use a default UUID if conversion fails
-        try:
-            user_uuid = uuid.UUID(current_user["sub"])
-        except (KeyError, ValueError):
-            user_uuid = uuid.UUID("00000000-0000-0000-0000-000000000000")
-            
-        log_activity(
-            db=db, 
-            activity="compliance_record_deleted", 
-            user_id=user_uuid, 
-            details=f"Deleted compliance record: {record_id}"
-        )
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
-        # Continue even if logging fails
-    
     return None
 
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_compliance_stats(
     entity_type: Optional[EntityTypeEnum] = None,
+    group_by: List[StatsGroupByEnum] = Query([]),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get compliance statistics.
+    Get compliance statistics, optionally broken down by entity type and/or compliance type.
     """
-    query = db.query(ComplianceRecord)
-    
-    if entity_type:
-        query = query.filter(ComplianceRecord.entity_type == entity_type.value)
-    
-    total = query.count()
-    compliant = query.filter(ComplianceRecord.compliance_status == ComplianceStatus.COMPLIANT.value).count()
-    non_compliant = query.filter(ComplianceRecord.compliance_status == ComplianceStatus.NON_COMPLIANT.value).count()
-    pending = query.filter(ComplianceRecord.compliance_status == ComplianceStatus.PENDING_REVIEW.value).count()
-    exempted = query.filter(ComplianceRecord.compliance_status == ComplianceStatus.EXEMPTED.value).count()
-    
-    return {
-        "total": total,
-        "compliant": compliant,
-        "non_compliant": non_compliant,
-        "pending_review": pending,
-        "exempted": exempted,
-        "compliance_rate": (compliant / total * 100) if total > 0 else 0
-    }
+    counts = await fetch_status_counts(db, entity_type.value if entity_type else None)
+    return build_stats(counts, [field.value for field in group_by])
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from typing import List, Optional, Dict, Any
-from uuid import UUID
+from uuid import UUID, uuid4
 import logging
 
-from app.database.base import get_db
+from app.database.base import get_db, get_async_db
+from app.database.replicas import get_read_db
 from app.models.document import Document, TaskDocument, DocumentStatus, DocumentCategory
-from app.models.user import User
 from app.models.compliance_task import ComplianceTask
 from app.schemas.document import (
     Document as DocumentSchema,
@@ -18,7 +19,10 @@ from app.schemas.document import (
 )
 from app.utils.file_storage import save_upload_file
 from app.auth.security import get_current_user
-from app.utils.audit import log_activity
+from app.auth.identity import resolve_user_id
+from app.auth.permissions import Permission, require_permission
+from app.utils.audit import stage_activity
+from app.utils.etags import check_etag, match_etag
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -31,25 +35,19 @@ async def upload_document(
     expiry_date: Optional[str] = Form(None),
     process_id: Optional[str] = Form(None),
     db: Session = Depends(get_db),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.DOCUMENT_UPLOAD))
 ):
     """
     Upload a new document with metadata.
-    Only users with roles Fund Manager, Compliance Officer, or Admin can upload documents.
+    Requires the DOCUMENT_UPLOAD permission.
     """
-    # Check if user has permission to upload documents
-    if current_user.get('role') not in ["Fund Manager", "Compliance Officer", "Admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to upload documents"
-        )
-    
     try:
         # Save the file to local storage
         file_path = save_upload_file(file, category)
         
         # Create a new document record in the database
         db_document = Document(
+            document_id=uuid4(),
             name=name,
             category=category,
             file_path=file_path,
@@ -61,22 +59,14 @@ async def upload_document(
             db_document.expiry_date = expiry_date
             
         db.add(db_document)
-        db.commit()
-        db.refresh(db_document)
-        
-        # Log document upload activity
-        user_id = None
-        if "sub" in current_user:
-            user = db.query(User).filter(User.email == current_user["sub"]).first()
-            if user:
-                user_id = user.user_id
-                
-        log_activity(
+        stage_activity(
             db, 
             "document_upload", 
-            user_id, 
+            resolve_user_id(db, current_user), 
             f"Document uploaded: {db_document.document_id} - {name} ({category})"
         )
+        db.commit()
+        db.refresh(db_document)
         
         return db_document
     except Exception as e:
@@ -89,38 +79,58 @@ async def upload_document(
 
 @router.get("/", response_model=List[DocumentSchema])
 async def list_documents(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by document category"),
     status: Optional[str] = Query(None, description="Filter by document status"),
     name: Optional[str] = Query(None, description="Filter by document name"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    List all documents with optional filters.
+    List all documents with optional filters. Supports If-None-Match.
     """
-    query = db.query(Document)
+    query = select(Document)
     
     # Apply filters if provided
     if category:
-        query = query.filter(Document.category == category)
+        query = query.where(Document.category == category)
     if status:
-        query = query.filter(Document.status == status)
+        query = query.where(Document.status == status)
     if name:
-        query = query.filter(Document.name.ilike(f"%{name}%"))
+        query = query.where(Document.name.ilike(f"%{name}%"))
     
-    documents = query.all()
+    # Not paginated, so a validator would scan the same rows as the list
+    # itself; the tag is taken from the loaded rows and a 304 only saves
+    # serialising and sending them
+    documents = (await db.execute(query)).scalars().all()
+    not_modified = match_etag(
+        request, response, request.url.query,
+        *((document.document_id, document.updated_at) for document in documents)
+    )
+    if not_modified:
+        return not_modified
     return documents
 
 @router.get("/{document_id}", response_model=DocumentSchema)
 async def get_document(
     document_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    Get a specific document by ID.
+    Get a specific document by ID. Supports If-None-Match.
     """
-    document = db.query(Document).filter(Document.document_id == document_id).first()
+    not_modified = await check_etag(
+        request, response, db,
+        select(Document.updated_at).where(Document.document_id == document_id),
+        document_id
+    )
+    if not_modified:
+        return not_modified
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -175,22 +185,14 @@ async def link_document_to_task(
     )
     
     db.add(task_document)
-    db.commit()
-    db.refresh(task_document)
-    
-    # Log document link activity
-    user_id = None
-    if "sub" in current_user:
-        user = db.query(User).filter(User.email == current_user["sub"]).first()
-        if user:
-            user_id = user.user_id
-            
-    log_activity(
+    stage_activity(
         db, 
         "document_task_link", 
-        user_id, 
+        resolve_user_id(db, current_user), 
         f"Document {document_id} linked to task {task_link.compliance_task_id}"
     )
+    db.commit()
+    db.refresh(task_document)
     
     return task_document
 
@@ -198,18 +200,11 @@ async def link_document_to_task(
 async def delete_document(
     document_id: UUID,
     db: Session = Depends(get_db),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.DOCUMENT_DELETE))
 ):
     """
-    Delete a document (only for Admin users).
+    Delete a document (requires the DOCUMENT_DELETE permission).
     """
-    # Only Admin users can delete documents
-    if current_user.get('role') != "Admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only Admin users can delete documents"
-        )
-    
     document = db.query(Document).filter(Document.document_id == document_id).first()
     if not document:
         raise HTTPException(
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Dict, Any, Optional
-from app.database.base import get_db
+from app.database.base import get_db, get_async_db
+from app.database.replicas import get_read_db
 from app.models.lp_details import LPDetails
 from app.models.lp_drawdowns import LPDrawdown
 from app.schemas.lp import (
@@ -9,8 +12,11 @@ from app.schemas.lp import (
     LPDrawdownCreate, LPDrawdownUpdate, LPDrawdownResponse,
     LPWithDrawdowns
 )
-from app.auth.security import get_current_user, check_role
-from app.utils.audit import log_activity
+from app.auth.identity import resolve_user_id
+from app.auth.permissions import Permission, require_permission
+from app.utils.audit import stage_activity
+from app.utils.pagination import keyset_page, keyset_query, set_cursor_headers
+from app.utils.etags import check_etag, page_validator
 import uuid
 from sqlalchemy.exc import IntegrityError
 from fastapi.responses import JSONResponse
@@ -21,42 +27,26 @@ router = APIRouter()
 @router.post("/", response_model=LPDetailsResponse, status_code=status.HTTP_201_CREATED)
 async def create_lp(
     lp_data: LPDetailsCreate,
-    current_user: Dict[str, Any] = Depends(get_current_user),
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.LP_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Create a new LP (Limited Partner) record.
     """
-    # Check if user has appropriate role
-    if current_user.get("role") not in ["Fund Manager", "Compliance Officer", "Fund Admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"User does not have one of the required roles: Fund Manager, Compliance Officer, Fund Admin"
-        )
-    
     # Create new LP record
     new_lp = LPDetails(**lp_data.model_dump())
     
     try:
         db.add(new_lp)
+        stage_activity(
+            db=db, 
+            activity="lp_created", 
+            user_id=resolve_user_id(db, current_user), 
+            details=f"Created LP: {new_lp.lp_name}"
+        )
         db.commit()
         db.refresh(new_lp)
         
-        # Log the activity
-        try:
-            # Print the current_user dictionary to see what keys are available
-            print(f"Current user: {current_user}")
-            
-            log_activity(
-                db=db, 
-                activity="lp_created", 
-                user_id=uuid.UUID(current_user.get("sub", "00000000-0000-0000-0000-000000000000")), 
-                details=f"Created LP: {new_lp.lp_name}"
-            )
-        except Exception as e:
-            print(f"Error logging activity: {str(e)}")
-            # Continue even if logging fails
-        
         return new_lp
     except IntegrityError:
         db.rollback()
@@ -67,25 +57,59 @@ async def create_lp(
 
 @router.get("/", response_model=List[LPDetailsResponse])
 async def get_all_lps(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get all LP records with pagination.
+    Get all LP records, oldest first, with cursor pagination.
+
+    Cursors for the neighbouring pages are returned in the X-Next-Cursor
+    and X-Prev-Cursor headers. Supports If-None-Match.
     """
-    lps = db.query(LPDetails).offset(skip).limit(limit).all()
-    return lps
+    # Validated over the requested page only; the query string carries the cursor and limit
+    page_query = keyset_query(select(LPDetails), LPDetails.created_at, LPDetails.lp_id, limit=limit, cursor=cursor, skip=skip)
+    not_modified = await check_etag(
+        request, response, db, page_validator(page_query, LPDetails.updated_at, LPDetails.lp_id), request.url.query
+    )
+    if not_modified:
+        return not_modified
+    page = await keyset_page(
+        db, select(LPDetails), LPDetails.created_at, LPDetails.lp_id,
+        limit=limit, cursor=cursor, skip=skip
+    )
+    set_cursor_headers(response, page)
+    return page.items
 
 @router.get("/{lp_id}", response_model=LPWithDrawdowns)
 async def get_lp(
     lp_id: uuid.UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific LP record by ID, including their drawdowns.
+    Get a specific LP record by ID, including their drawdowns. Supports If-None-Match.
     """
-    lp = db.query(LPDetails).filter(LPDetails.lp_id == lp_id).first()
+    # The body includes the drawdowns, so their changes must change the tag too
+    of_lp = LPDrawdown.lp_id == lp_id
+    validator = select(
+        LPDetails.updated_at,
+        select(func.max(LPDrawdown.updated_at)).where(of_lp).scalar_subquery(),
+        select(func.count()).select_from(LPDrawdown).where(of_lp).scalar_subquery()
+    ).where(LPDetails.lp_id == lp_id)
+    not_modified = await check_etag(request, response, db, validator, lp_id)
+    if not_modified:
+        return not_modified
+    # Async sessions cannot lazy-load, so fetch the drawdowns up front
+    lp = await db.scalar(
+        select(LPDetails)
+        .options(selectinload(LPDetails.drawdowns))
+        .where(LPDetails.lp_id == lp_id)
+    )
     if not lp:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,14 +121,12 @@ async def get_lp(
 async def update_lp(
     lp_id: uuid.UUID,
     lp_data: LPDetailsUpdate,
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.LP_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Update an existing LP record.
     """
-    # Check if user has appropriate role
-    check_role(["Fund Manager", "Compliance Officer", "Fund Admin"])
-    
     lp = db.query(LPDetails).filter(LPDetails.lp_id == lp_id).first()
     if not lp:
         raise HTTPException(
@@ -118,24 +140,15 @@ async def update_lp(
         setattr(lp, key, value)
     
     try:
+        stage_activity(
+            db=db, 
+            activity="lp_updated", 
+            user_id=resolve_user_id(db, current_user), 
+            details=f"Updated LP: {lp.lp_name}"
+        )
         db.commit()
         db.refresh(lp)
         
-        # Log the activity
-        try:
-            # Print the current_user dictionary to see what keys are available
-            print(f"Current user: {get_current_user()}")
-            
-            log_activity(
-                db=db, 
-                activity="lp_updated", 
-                user_id=uuid.UUID(get_current_user().get("sub", "00000000-0000-0000-0000-000000000000")), 
-                details=f"Updated LP: {lp.lp_name}"
-            )
-        except Exception as e:
-            print(f"Error logging activity: {str(e)}")
-            # Continue even if logging fails
-        
         return lp
     except IntegrityError:
         db.rollback()
@@ -147,14 +160,12 @@ async def update_lp(
 @router.delete("/{lp_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_lp(
     lp_id: uuid.UUID,
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.LP_DELETE)),
     db: Session = Depends(get_db)
 ):
     """
     Delete an LP record.
     """
-    # Check if user has appropriate role
-    check_role(["Fund Manager", "Fund Admin"])
-    
     lp = db.query(LPDetails).filter(LPDetails.lp_id == lp_id).first()
     if not lp:
         raise HTTPException(
@@ -162,41 +173,27 @@ async def delete_lp(
             detail="LP not found"
         )
     
-    # Log before deletion
-    lp_name = lp.lp_name
-    
     db.delete(lp)
+    stage_activity(
+        db=db, 
+        activity="lp_deleted", 
+        user_id=resolve_user_id(db, current_user), 
+        details=f"Deleted LP: {lp.lp_name}"
+    )
     db.commit()
     
-    # Log the activity
-    try:
-        # Print the current_user dictionary to see what keys are available
-        print(f"Current user: {get_current_user()}")
-        
-        log_activity(
-            db=db, 
-            activity="lp_deleted", 
-            user_id=uuid.UUID(get_current_user().get("sub", "00000000-0000-0000-0000-000000000000")), 
-            details=f"Deleted LP: {lp_name}"
-        )
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
-        # Continue even if logging fails
-    
     return None
 
 # LP Drawdown Endpoints
 @router.post("/drawdowns", response_model=LPDrawdownResponse, status_code=status.HTTP_201_CREATED)
 async def create_drawdown(
     drawdown_data: LPDrawdownCreate,
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.DRAWDOWN_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Create a new drawdown record for an LP.
     """
-    # Check if user has appropriate role
-    check_role(["Fund Manager", "Fund Admin"])
-    
     # Check if LP exists
     lp = db.query(LPDetails).filter(LPDetails.lp_id == drawdown_data.lp_id).first()
     if not lp:
@@ -209,55 +206,70 @@ async def create_drawdown(
     new_drawdown = LPDrawdown(**drawdown_data.model_dump())
     
     db.add(new_drawdown)
+    stage_activity(
+        db=db, 
+        activity="drawdown_created", 
+        user_id=resolve_user_id(db, current_user), 
+        details=f"Created drawdown for LP: {lp.lp_name}, Amount: {new_drawdown.amount}"
+    )
     db.commit()
     db.refresh(new_drawdown)
     
-    # Log the activity
-    try:
-        user = await get_current_user()
-        # Print the current_user dictionary to see what keys are available
-        print(f"Current user: {user}")
-        
-        log_activity(
-            db=db, 
-            activity="drawdown_created", 
-            user_id=uuid.UUID(get_current_user().get("sub", "00000000-0000-0000-0000-000000000000")), 
-            details=f"Created drawdown for LP: {lp.lp_name}, Amount: {new_drawdown.amount}"
-        )
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
-        # Continue even if logging fails
-    
     return new_drawdown
 
 @router.get("/drawdowns/list", response_model=List[LPDrawdownResponse])
 async def get_all_drawdowns(
+    request: Request,
+    response: Response,
     lp_id: Optional[uuid.UUID] = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get all drawdown records with optional filtering by LP.
+    Get all drawdown records with optional filtering by LP, with cursor pagination.
+
+    Cursors for the neighbouring pages are returned in the X-Next-Cursor
+    and X-Prev-Cursor headers. Supports If-None-Match.
     """
-    print("Getting drawdowns with lp_id:", lp_id)
-    query = db.query(LPDrawdown)
+    query = select(LPDrawdown)
     
     if lp_id:
-        query = query.filter(LPDrawdown.lp_id == lp_id)
+        query = query.where(LPDrawdown.lp_id == lp_id)
+    
+    page_query = keyset_query(query, LPDrawdown.created_at, LPDrawdown.drawdown_id, limit=limit, cursor=cursor, skip=skip)
+    not_modified = await check_etag(
+        request, response, db, page_validator(page_query, LPDrawdown.updated_at, LPDrawdown.drawdown_id), request.url.query
+    )
+    if not_modified:
+        return not_modified
     
-    drawdowns = query.offset(skip).limit(limit).all()
-    return drawdowns
+    page = await keyset_page(
+        db, query, LPDrawdown.created_at, LPDrawdown.drawdown_id,
+        limit=limit, cursor=cursor, skip=skip
+    )
+    set_cursor_headers(response, page)
+    return page.items
 
 @router.get("/drawdowns/{drawdown_id}", response_model=LPDrawdownResponse)
 async def get_drawdown(
     drawdown_id: uuid.UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific drawdown record by ID.
+    Get a specific drawdown record by ID. Supports If-None-Match.
     """
-    drawdown = db.query(LPDrawdown).filter(LPDrawdown.drawdown_id == drawdown_id).first()
+    not_modified = await check_etag(
+        request, response, db,
+        select(LPDrawdown.updated_at).where(LPDrawdown.drawdown_id == drawdown_id),
+        drawdown_id
+    )
+    if not_modified:
+        return not_modified
+    drawdown = await db.get(LPDrawdown, drawdown_id)
     if not drawdown:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -269,14 +281,12 @@ async def get_drawdown(
 async def update_drawdown(
     drawdown_id: uuid.UUID,
     drawdown_data: LPDrawdownUpdate,
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.DRAWDOWN_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Update an existing drawdown record.
     """
-    # Check if user has appropriate role
-    check_role(["Fund Manager", "Fund Admin"])
-    
     drawdown = db.query(LPDrawdown).filter(LPDrawdown.drawdown_id == drawdown_id).first()
     if not drawdown:
         raise HTTPException(
@@ -289,37 +299,26 @@ async def update_drawdown(
     for key, value in update_data.items():
         setattr(drawdown, key, value)
     
+    stage_activity(
+        db=db, 
+        activity="drawdown_updated", 
+        user_id=resolve_user_id(db, current_user), 
+        details=f"Updated drawdown: {drawdown_id}"
+    )
     db.commit()
     db.refresh(drawdown)
     
-    # Log the activity
-    try:
-        # Print the current_user dictionary to see what keys are available
-        print(f"Current user: {get_current_user()}")
-        
-        log_activity(
-            db=db, 
-            activity="drawdown_updated", 
-            user_id=uuid.UUID(get_current_user().get("sub", "00000000-0000-0000-0000-000000000000")), 
-            details=f"Updated drawdown: {drawdown_id}"
-        )
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
-        # Continue even if logging fails
-    
     return drawdown
 
 @router.delete("/drawdowns/{drawdown_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_drawdown(
     drawdown_id: uuid.UUID,
+    current_user: Dict[str, Any] = Depends(require_permission(Permission.DRAWDOWN_WRITE)),
     db: Session = Depends(get_db)
 ):
     """
     Delete a drawdown record.
     """
-    # Check if user has appropriate role
-    check_role(["Fund Manager", "Fund Admin"])
-    
     drawdown = db.query(LPDrawdown).filter(LPDrawdown.drawdown_id == drawdown_id).first()
     if not drawdown:
         raise HTTPException(
@@ -328,21 +327,12 @@ async def delete_drawdown(
         )
     
     db.delete(drawdown)
+    stage_activity(
+        db=db, 
+        activity="drawdown_deleted", 
+        user_id=resolve_user_id(db, current_user), 
+        details=f"Deleted drawdown: {drawdown_id}"
+    )
     db.commit()
     
-    # Log the activity
-    try:
-        # Print the current_user dictionary to see what keys are available
-        print(f"Current user: {get_current_user()}")
-        
-        log_activity(
-            db=db, 
-            activity="drawdown_deleted", 
-            user_id=uuid.UUID(get_current_user().get("sub", "00000000-0000-0000-0000-000000000000")), 
-            details=f"Deleted drawdown: {drawdown_id}"
-        )
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
-        # Continue even if logging fails
-    
     return None
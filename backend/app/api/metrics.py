@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from typing import Dict, Any
+from app.auth.security import token_cache, password_pool
+from app.auth.permissions import Permission, require_permission
+from app.auth.login_throttle import ip_login_limiter, email_login_limiter
+from app.database.base import pool_telemetry, async_pool_telemetry
+from app.database.replicas import replica_router
+from app.utils.audit import audit_buffer
+from app.utils.compliance_stats import compliance_stats_cache
+from app.utils.overdue_sweeper import sweep_stats
+from app.utils.task_recurrence import materializer_stats
+
+router = APIRouter()
+
+@router.get("/", response_model=Dict[str, Any])
+async def get_metrics(current_user: Dict[str, Any] = Depends(require_permission(Permission.VIEW_METRICS))):
+    """
+    Get in-process performance counters for this worker.
+    """
+    return {
+        "token_cache": token_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "login_rate_limit": {
+            "ip": ip_login_limiter.stats(),
+            "email": email_login_limiter.stats(),
+        },
+        "db_pool": {
+            "sync": pool_telemetry.stats(),
+            "async": async_pool_telemetry.stats(),
+        },
+        "read_replicas": replica_router.stats(),
+        "audit_buffer": audit_buffer.stats(),
+        "compliance_stats_cache": compliance_stats_cache.stats(),
+        "overdue_sweeper": sweep_stats.stats(),
+        "task_recurrence": materializer_stats.stats(),
+    }
@@ -1,19 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database.base import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, or_, select
+from app.database.replicas import get_read_db
 from app.models.compliance_task import ComplianceTask, TaskState
-from app.auth.security import get_current_user, check_role
-from app.schemas.report import TaskStats
-from datetime import datetime
-from typing import Dict, Any
+from app.auth.security import get_current_user
+from app.schemas.report import TaskStats, TaskTrend, TaskTrendBucket, TaskTrendCounts, TrendPeriodEnum
+from app.utils.task_trends import EVENT_KINDS, bucket_starts, task_trend
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+# Longest range the trend report will compute in one request
+MAX_TREND_BUCKETS = 260
 
 router = APIRouter()
 
 @router.get("/tasks-stats", response_model=TaskStats)
 async def get_task_stats(
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get statistics on compliance tasks:
@@ -21,25 +25,57 @@ async def get_task_stats(
     - Number of completed tasks
     - Number of overdue tasks
     """
-    # Total tasks
-    total_tasks = db.query(func.count(ComplianceTask.compliance_task_id)).scalar()
-    
-    # Completed tasks
-    completed_tasks = db.query(func.count(ComplianceTask.compliance_task_id))\
-        .filter(ComplianceTask.state == TaskState.COMPLETED.value)\
-        .scalar()
-    
-    # Overdue tasks
-    now = datetime.utcnow()
-    overdue_tasks = db.query(func.count(ComplianceTask.compliance_task_id))\
-        .filter(
-            ComplianceTask.deadline < now,
-            ComplianceTask.state != TaskState.COMPLETED.value
-        )\
-        .scalar()
+    # One pass over compliance_tasks; tasks past their deadline that the
+    # overdue sweeper has not reached yet still count as overdue
+    now = datetime.now(timezone.utc)
+    completed = ComplianceTask.state == TaskState.COMPLETED.value
+    overdue = or_(
+        ComplianceTask.state == TaskState.OVERDUE.value,
+        and_(ComplianceTask.deadline < now, ~completed)
+    )
+    total_tasks, completed_tasks, overdue_tasks = (await db.execute(select(
+        func.count(),
+        func.count().filter(completed),
+        func.count().filter(overdue)
+    ).select_from(ComplianceTask))).one()
     
     return TaskStats(
         total_tasks=total_tasks,
         completed_tasks=completed_tasks,
         overdue_tasks=overdue_tasks
     )
+
+@router.get("/tasks-trend", response_model=TaskTrend)
+async def get_task_trend(
+    period: TrendPeriodEnum = TrendPeriodEnum.WEEK,
+    start: Optional[date] = None,
+    end: Optional[date] = Query(None, description="Exclusive; defaults to tomorrow"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get created, completed and overdue task counts per week or month, by category.
+
+    Defaults to the last 12 weeks or 12 months up to and including today.
+    ``start`` is widened to the beginning of its week (Monday) or month.
+    """
+    end = end or date.today() + timedelta(days=1)
+    if start is None:
+        start = end - (timedelta(weeks=12) if period == TrendPeriodEnum.WEEK else timedelta(days=365))
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    if len(bucket_starts(start, end, period.value)) > MAX_TREND_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {MAX_TREND_BUCKETS} {period.value}s"
+        )
+
+    buckets = []
+    for bucket, per_category in (await task_trend(db, period.value, start, end)).items():
+        total = {kind: sum(counts[kind] for counts in per_category.values()) for kind in EVENT_KINDS}
+        buckets.append(TaskTrendBucket(
+            start=bucket,
+            total=TaskTrendCounts(**total),
+            by_category={category: TaskTrendCounts(**counts) for category, counts in per_category.items()}
+        ))
+    return TaskTrend(period=period, buckets=buckets)
@@ -0,0 +1,77 @@
+from typing import Optional, Dict, Any
+from fastapi import Depends
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+import os
+import uuid
+
+from app.auth.security import get_current_user
+from app.database.base import get_db
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+# Process-wide email -> user_id cache, invalidated whenever a user row changes
+USER_ID_CACHE_SIZE = int(os.getenv("USER_ID_CACHE_SIZE", "4096"))
+USER_ID_CACHE_TTL_SECONDS = int(os.getenv("USER_ID_CACHE_TTL_SECONDS", "300"))
+
+user_id_cache = TTLCache(maxsize=USER_ID_CACHE_SIZE, ttl=USER_ID_CACHE_TTL_SECONDS)
+
+_SESSION_MEMO_KEY = "resolved_user_ids"
+
+
+def resolve_user_id(db: Session, current_user: Dict[str, Any]) -> Optional[uuid.UUID]:
+    """
+    Turn the JWT subject (the user's email) into a user_id.
+
+    Lookups are memoized on the request's session and in a process-wide TTL
+    cache, so a request issues at most one user query and usually none.
+    On a miss the full User row is loaded, which leaves it in the session's
+    identity map for a following ``db.get(User, user_id)``.
+
+    Args:
+        db: Database session for the current request
+        current_user: Decoded JWT payload
+
+    Returns:
+        The user's UUID, or None if the token has no subject or the user does not exist
+    """
+    email = current_user.get("sub")
+    if not email:
+        return None
+
+    memo = db.info.setdefault(_SESSION_MEMO_KEY, {})
+    if email in memo:
+        return memo[email]
+
+    user_id = user_id_cache.get(email)
+    if user_id is None:
+        user = db.query(User).filter(User.email == email).first()
+        if user is not None:
+            user_id = user.user_id
+            user_id_cache.set(email, user_id)
+
+    memo[email] = user_id
+    return user_id
+
+
+def get_current_user_id(
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Optional[uuid.UUID]:
+    """
+    Dependency that resolves the authenticated user's UUID once per request.
+    """
+    return resolve_user_id(db, current_user)
+
+
+def _invalidate_user(mapper, connection, target: User) -> None:
+    user_id_cache.invalidate(target.email)
+    # A changed email must also drop the entry cached under the old address
+    history = inspect(target).attrs.email.history
+    for old_email in history.deleted or ():
+        user_id_cache.invalidate(old_email)
+
+
+event.listen(User, "after_insert", _invalidate_user)
+event.listen(User, "after_update", _invalidate_user)
+event.listen(User, "after_delete", _invalidate_user)
@@ -0,0 +1,58 @@
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+import math
+import os
+
+from app.utils.rate_limit import TokenBucketLimiter
+
+# Every attempt from a client IP draws from its bucket
+LOGIN_RATE_LIMIT_IP_BURST = int(os.getenv("LOGIN_RATE_LIMIT_IP_BURST", "60"))
+LOGIN_RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("LOGIN_RATE_LIMIT_IP_PER_MINUTE", "60"))
+# Only failed attempts draw from an account's bucket, so a user who keeps
+# logging in successfully is never locked out by their own traffic
+LOGIN_RATE_LIMIT_EMAIL_BURST = int(os.getenv("LOGIN_RATE_LIMIT_EMAIL_BURST", "5"))
+LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE", "5"))
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", "10000"))
+
+ip_login_limiter = TokenBucketLimiter(
+    capacity=LOGIN_RATE_LIMIT_IP_BURST,
+    refill_rate=LOGIN_RATE_LIMIT_IP_PER_MINUTE / 60,
+    max_keys=LOGIN_RATE_LIMIT_MAX_KEYS
+)
+email_login_limiter = TokenBucketLimiter(
+    capacity=LOGIN_RATE_LIMIT_EMAIL_BURST,
+    refill_rate=LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE / 60,
+    max_keys=LOGIN_RATE_LIMIT_MAX_KEYS
+)
+
+
+def _too_many_attempts(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts, please retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def enforce_login_rate_limit(request: Request, email: str) -> None:
+    """Raise 429 if the client IP or the account is throttled, charging the IP's bucket."""
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = ip_login_limiter.consume(client_ip)
+    if retry_after:
+        raise _too_many_attempts(retry_after)
+
+    retry_after = email_login_limiter.peek(email.lower())
+    if retry_after:
+        raise _too_many_attempts(retry_after)
+
+
+async def check_login_rate_limit(request: Request, form_data: OAuth2PasswordRequestForm = Depends()) -> None:
+    """
+    Dependency that rejects throttled logins with 429 before any DB query or bcrypt call.
+    """
+    enforce_login_rate_limit(request, form_data.username)
+
+
+def record_failed_login(email: str) -> None:
+    """Charge a failed attempt against the account's bucket."""
+    email_login_limiter.consume(email.lower())
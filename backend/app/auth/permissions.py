@@ -0,0 +1,96 @@
+from typing import Dict, Any, Iterable
+from fastapi import Depends, HTTPException, status
+import enum
+
+from app.auth.security import get_current_user
+
+
+class Permission(enum.IntFlag):
+    LP_WRITE = 1 << 0
+    LP_DELETE = 1 << 1
+    DRAWDOWN_WRITE = 1 << 2
+    COMPLIANCE_WRITE = 1 << 3
+    DOCUMENT_UPLOAD = 1 << 4
+    DOCUMENT_DELETE = 1 << 5
+    FUND_MANAGER_DASHBOARD = 1 << 6
+    VIEW_METRICS = 1 << 7
+    AUDIT_LOG_READ = 1 << 8
+
+
+# Central permission table: the only place role names map to what they may do
+ROLE_PERMISSIONS: Dict[str, Iterable[Permission]] = {
+    "Fund Manager": (
+        Permission.LP_WRITE,
+        Permission.LP_DELETE,
+        Permission.DRAWDOWN_WRITE,
+        Permission.COMPLIANCE_WRITE,
+        Permission.DOCUMENT_UPLOAD,
+        Permission.FUND_MANAGER_DASHBOARD,
+        Permission.VIEW_METRICS,
+        Permission.AUDIT_LOG_READ,
+    ),
+    "Compliance Officer": (
+        Permission.LP_WRITE,
+        Permission.COMPLIANCE_WRITE,
+        Permission.DOCUMENT_UPLOAD,
+        Permission.AUDIT_LOG_READ,
+    ),
+    "Fund Admin": (
+        Permission.LP_WRITE,
+        Permission.LP_DELETE,
+        Permission.DRAWDOWN_WRITE,
+        Permission.COMPLIANCE_WRITE,
+    ),
+    "Admin": (
+        Permission.DOCUMENT_UPLOAD,
+        Permission.DOCUMENT_DELETE,
+        Permission.VIEW_METRICS,
+        Permission.AUDIT_LOG_READ,
+    ),
+    "LP": (),
+}
+
+
+def compile_role_masks(table: Dict[str, Iterable[Permission]]) -> Dict[str, int]:
+    """
+    Compile the role -> permissions table into role -> integer bitmask.
+    """
+    masks = {}
+    for role, permissions in table.items():
+        mask = 0
+        for permission in permissions:
+            mask |= permission
+        masks[role] = int(mask)
+    return masks
+
+
+# Compiled once at import time; login stamps the mask into the JWT as "perms"
+ROLE_MASKS: Dict[str, int] = compile_role_masks(ROLE_PERMISSIONS)
+
+
+def permissions_for_role(role: str) -> int:
+    """Return the compiled permission bitmask for a role (0 for unknown roles)."""
+    return ROLE_MASKS.get(role, 0)
+
+
+def require_permission(permission: Permission):
+    """
+    Dependency factory enforcing a permission with a single mask test.
+
+    The mask comes from the token's "perms" claim. Tokens issued before
+    the claim existed fall back to the compiled mask for their role, so
+    neither path touches the database.
+    """
+    required = int(permission)
+
+    async def permission_checker(current_user: Dict[str, Any] = Depends(get_current_user)):
+        mask = current_user.get("perms")
+        if mask is None:
+            mask = permissions_for_role(current_user.get("role"))
+        if mask & required != required:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"User does not have the required permission: {permission.name}"
+            )
+        return current_user
+    return permission_checker
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+import hashlib
+import os
+import secrets
+import uuid
+
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+REFRESH_DENYLIST_SIZE = int(os.getenv("REFRESH_DENYLIST_SIZE", "65536"))
+
+# In-memory denylist of revoked token digests. It is only a fast path: the
+# revoked_at column stays authoritative, so an evicted entry is still refused.
+revoked_refresh_tokens = TTLCache(
+    maxsize=REFRESH_DENYLIST_SIZE,
+    ttl=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+)
+
+
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are 256-bit random values, so a fast digest is enough;
+    # unlike passwords they cannot be brute-forced from the hash.
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def issue_refresh_token(db: Session, user_id: uuid.UUID) -> str:
+    """
+    Create a refresh token for a user and stage it on the session.
+
+    The caller is responsible for committing the session.
+
+    Returns:
+        The raw refresh token to hand to the client
+    """
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_refresh_token_user(db: Session, token: str) -> Tuple[RefreshToken, User]:
+    """
+    Look up the user a refresh token belongs to with a single indexed query.
+
+    Revoked tokens found in the in-memory denylist are refused without
+    touching the database.
+
+    Raises:
+        HTTPException: 401 if the token is unknown, revoked or expired
+    """
+    token_hash = hash_refresh_token(token)
+    if revoked_refresh_tokens.get(token_hash):
+        raise _invalid_refresh_token()
+
+    row = db.query(RefreshToken, User).join(User, RefreshToken.user_id == User.user_id)\
+        .filter(RefreshToken.token_hash == token_hash)\
+        .first()
+    if row is None:
+        raise _invalid_refresh_token()
+
+    refresh_token, user = row
+    if refresh_token.revoked_at is not None:
+        revoked_refresh_tokens.set(token_hash, True)
+        raise _invalid_refresh_token()
+    if refresh_token.expires_at <= datetime.now(timezone.utc):
+        raise _invalid_refresh_token()
+    return refresh_token, user
+
+
+def revoke_refresh_token(db: Session, token: str) -> Optional[RefreshToken]:
+    """
+    Revoke a refresh token and add it to the in-memory denylist.
+
+    The caller is responsible for committing the session.
+
+    Returns:
+        The revoked RefreshToken, or None if the token is unknown
+    """
+    token_hash = hash_refresh_token(token)
+    revoked_refresh_tokens.set(token_hash, True)
+    refresh_token = db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
+    if refresh_token is not None and refresh_token.revoked_at is None:
+        refresh_token.revoked_at = datetime.now(timezone.utc)
+    return refresh_token
@@ -1,15 +1,37 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional
+import hashlib
+import os
+import time
 import jwt
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 import bcrypt
+from app.utils.cache import TTLCache
+from app.utils.worker_pool import BoundedWorkerPool, PoolSaturatedError
 
 # JWT configuration
 SECRET_KEY = "your-secret-key-keep-it-secret"  # In production, use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Verified-token cache: decoded payloads keyed by a digest of the raw token
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+# Upper bound on how long a payload without an ``exp`` claim stays cached
+TOKEN_CACHE_MAX_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "300"))
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_MAX_TTL_SECONDS)
+
+# bcrypt runs on a bounded worker pool so it never blocks the event loop
+BCRYPT_MAX_CONCURRENCY = int(os.getenv("BCRYPT_MAX_CONCURRENCY", "4"))
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "32"))
+
+password_pool = BoundedWorkerPool(
+    max_workers=BCRYPT_MAX_CONCURRENCY,
+    max_queue=BCRYPT_MAX_QUEUE,
+    name="bcrypt"
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -22,6 +44,34 @@ def get_password_hash(password: str) -> str:
     salt = bcrypt.gensalt()
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+async def _run_on_password_pool(fn, *args):
+    try:
+        return await password_pool.run(fn, *args)
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Check a password against its bcrypt hash without blocking the event loop.
+
+    Raises:
+        HTTPException: 503 if the password worker pool is saturated
+    """
+    return await _run_on_password_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password with bcrypt without blocking the event loop.
+
+    Raises:
+        HTTPException: 503 if the password worker pool is saturated
+    """
+    return await _run_on_password_pool(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -32,6 +82,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decode and verify a JWT, serving repeat tokens from the verified-token cache.
+
+    Only tokens that passed signature and expiry verification are cached, and
+    each entry is evicted no later than the token's ``exp`` claim.
+
+    Raises:
+        jwt.PyJWTError: If the token is invalid or expired
+    """
+    key = _token_digest(token)
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    ttl = None
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = float(exp) - time.time()
+    token_cache.set(key, payload, ttl=ttl)
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,27 +115,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
     return payload
-
-def check_role(required_roles: Union[str, list]):
-    async def role_checker(current_user: dict = Depends(get_current_user)):
-        if isinstance(required_roles, list):
-            if current_user.get("role") not in required_roles:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"User does not have one of the required roles: {', '.join(required_roles)}"
-                )
-        else:
-            if current_user.get("role") != required_roles:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"User does not have the required role: {required_roles}"
-                )
-        return current_user
-    return role_checker
@@ -0,0 +1,121 @@
+from contextvars import ContextVar
+from typing import Dict, Optional
+import json
+import logging
+import os
+import time
+
+from fastapi import FastAPI, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.sql")
+
+# Default number of queries a request may issue before a warning is logged; 0 disables
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "0"))
+# Per-route overrides, e.g. "POST /api/tasks/=4;GET /api/tasks/=1"
+DB_QUERY_BUDGETS = os.getenv("DB_QUERY_BUDGETS", "")
+SLOW_STATEMENT_MAX_CHARS = 200
+
+
+def _parse_budgets(spec: str) -> Dict[str, int]:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        route, _, budget = item.rpartition("=")
+        budgets[route.strip()] = int(budget)
+    return budgets
+
+
+route_query_budgets = _parse_budgets(DB_QUERY_BUDGETS)
+
+
+class RequestQueryStats:
+    """Query count, total DB time and slowest statement for one request."""
+
+    __slots__ = ("count", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.total * 1000:.1f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest * 1000:.1f}"
+        )
+
+
+# The stats object is created per request and mutated in place, so queries
+# run from threadpool dependencies (which see a copy of the context) still
+# land in the request's totals
+_request_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on ``engine`` against the current request's stats."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_key(request: Request) -> str:
+    route = request.scope.get("route")
+    return f"{request.method} {getattr(route, 'path', request.url.path)}"
+
+
+def add_query_instrumentation(app: FastAPI) -> None:
+    """
+    Attach middleware that reports each request's SQL work.
+
+    Adds a ``Server-Timing`` header, logs one JSON line to ``app.sql`` and
+    warns when the request exceeds its route's query budget.
+    """
+
+    @app.middleware("http")
+    async def query_instrumentation(request: Request, call_next):
+        stats = RequestQueryStats()
+        token = _request_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _request_stats.reset(token)
+
+        route = _route_key(request)
+        response.headers.append("Server-Timing", stats.server_timing())
+        record = {
+            "route": route,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.total * 1000, 1),
+            "slowest_ms": round(stats.slowest * 1000, 1),
+            "slowest_statement": (stats.slowest_statement or "")[:SLOW_STATEMENT_MAX_CHARS] or None,
+        }
+        logger.info(json.dumps(record))
+
+        budget = route_query_budgets.get(route, DB_QUERY_BUDGET)
+        if budget and stats.count > budget:
+            logger.warning(json.dumps({"event": "query_budget_exceeded", "budget": budget, **record}))
+        return response
@@ -0,0 +1,75 @@
+from typing import Any, Dict, Type
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+
+class PoolTelemetry:
+    """
+    Counters for one engine's connection pool.
+
+    Checkout waits are timed by the pool class returned from
+    ``timed_pool_class``; live occupancy (checked out, overflow) is read
+    from the engine's current pool when ``stats`` is called.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.engine = None
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            result = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": self.wait_total / waits * 1000 if waits else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+        # size()/checkedout()/overflow() only exist on queue-style pools
+        for field in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, field, None)
+            if callable(method):
+                result[field] = method()
+        return result
+
+
+def timed_pool_class(base: Type[Pool], telemetry: PoolTelemetry) -> Type[Pool]:
+    """
+    Subclass ``base`` so every checkout reports how long it waited for a connection.
+
+    The telemetry is bound on the class rather than the instance because
+    ``Pool.recreate()`` (used by ``engine.dispose()``) builds a fresh pool
+    from ``self.__class__``.
+    """
+
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                telemetry.record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            telemetry.record_wait(time.perf_counter() - start)
+            return connection
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
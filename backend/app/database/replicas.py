@@ -0,0 +1,159 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import itertools
+import logging
+import os
+import time
+
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database.base import POOL_OPTIONS, get_async_db, get_db, to_async_url
+from app.database.instrumentation import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated read replica URLs; empty means every read goes to the primary
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+# A replica further behind the primary than this is skipped until it catches up
+DATABASE_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "5"))
+DATABASE_REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("DATABASE_REPLICA_CHECK_INTERVAL_SECONDS", "10"))
+DATABASE_REPLICA_CHECK_TIMEOUT_SECONDS = float(os.getenv("DATABASE_REPLICA_CHECK_TIMEOUT_SECONDS", "1"))
+
+# Zero when the replica has replayed everything it received, otherwise the
+# age of the last replayed transaction
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_async_engine(to_async_url(url), **POOL_OPTIONS)
+        instrument_engine(self.engine.sync_engine)
+        self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at = float("-inf")
+        self.last_error: Optional[str] = None
+
+    async def _measure_lag(self) -> Any:
+        async with self.engine.connect() as conn:
+            return await conn.scalar(_LAG_QUERY)
+
+    async def check(self, max_lag: float, timeout: float) -> None:
+        try:
+            # The connect is inside the timeout too: a blackholed replica
+            # must not hold up the request that triggered the check
+            lag = await asyncio.wait_for(self._measure_lag(), timeout)
+            self.lag = float(lag or 0)
+            self.healthy = self.lag <= max_lag
+            self.last_error = None if self.healthy else f"lag {self.lag:.1f}s exceeds {max_lag}s"
+        except asyncio.TimeoutError:
+            self.healthy = False
+            self.last_error = f"health check timed out after {timeout}s"
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)
+        if not self.healthy:
+            logger.warning("Read replica %s unavailable: %s", self.name, self.last_error)
+
+
+class ReplicaRouter:
+    """
+    Round-robin selection over read replicas with lazy health checks.
+
+    A replica's health (reachable, replication lag under ``max_lag``) is
+    re-checked at most every ``check_interval`` seconds, by whichever
+    request first finds it stale. Unhealthy replicas are skipped; when none
+    is usable ``choose`` returns None and the caller reads from the primary.
+    """
+
+    def __init__(self, urls: List[str], max_lag: float, check_interval: float, check_timeout: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._next = itertools.cycle(range(len(self.replicas)))
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    async def choose(self) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            now = time.monotonic()
+            if now - replica.checked_at >= self.check_interval:
+                # Claim the check first so concurrent requests use the last result
+                replica.checked_at = now
+                await replica.check(self.max_lag, self.check_timeout)
+            if replica.healthy:
+                self.replica_reads += 1
+                return replica
+        self.primary_fallbacks += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {"name": r.name, "healthy": r.healthy, "lag_seconds": r.lag, "last_error": r.last_error}
+                for r in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter(
+    DATABASE_REPLICA_URLS,
+    max_lag=DATABASE_REPLICA_MAX_LAG_SECONDS,
+    check_interval=DATABASE_REPLICA_CHECK_INTERVAL_SECONDS,
+    check_timeout=DATABASE_REPLICA_CHECK_TIMEOUT_SECONDS
+)
+
+_route_writes_cache: Dict[int, bool] = {}
+
+
+def _depends_on_primary(dependant) -> bool:
+    return any(
+        dep.call is get_db or _depends_on_primary(dep)
+        for dep in dependant.dependencies
+    )
+
+
+def _must_use_primary(request: Request) -> bool:
+    # Unsafe methods write; a route that also takes the sync write session may
+    # read back what it wrote, so it must not see a lagging replica
+    if request.method not in _SAFE_METHODS:
+        return True
+    route = request.scope.get("route")
+    dependant = getattr(route, "dependant", None)
+    if dependant is None:
+        return False
+    key = id(route)
+    if key not in _route_writes_cache:
+        _route_writes_cache[key] = _depends_on_primary(dependant)
+    return _route_writes_cache[key]
+
+
+async def get_read_db(request: Request, primary: AsyncSession = Depends(get_async_db)):
+    """
+    Dependency for read-only routes: an async session on a healthy replica.
+
+    Falls back to the primary session when no replicas are configured, none
+    is healthy, or the request may write.
+    """
+    replica = None if _must_use_primary(request) else await replica_router.choose()
+    if replica is None:
+        yield primary
+        return
+    async with replica.sessionmaker() as db:
+        yield db
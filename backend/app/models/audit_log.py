@@ -1,22 +1,38 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, UUID, DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.base import Base
+from app.utils.audit_partitions import DEFAULT_PARTITION, ensure_partitions
 
 
 class AuditLog(Base):
     """
     Model for storing audit logs related to user activities in the system.
     Tracks actions taken by users for compliance and accountability purposes.
+
+    The table is range-partitioned by month on ``timestamp`` (see
+    app/utils/audit_partitions.py), so the partition key is part of the
+    primary key.
     """
     __tablename__ = "audit_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     log_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=True)
-    activity = Column(String, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=True, index=True)
+    activity = Column(String, nullable=False, index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False, index=True)
     details = Column(Text, nullable=True)
 
     # Relationship with User model
     user = relationship("User", back_populates="audit_logs")
+
+
+def _create_initial_partitions(target, connection, **kw):
+    # create_all() gives the same layout as migration 008: a catch-all
+    # default partition plus the current and upcoming months
+    connection.execute(DDL(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF audit_logs DEFAULT"))
+    ensure_partitions(connection)
+
+
+event.listen(AuditLog.__table__, "after_create", _create_initial_partitions)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..database.base import Base
@@ -34,7 +34,7 @@ class PortfolioComplianceRecord(Base):
     comments = Column(Text, nullable=True)
 
 
-from sqlalchemy import Column, String, ForeignKey, Text, DateTime, text, Enum
+from sqlalchemy import Column, String, ForeignKey, Text, DateTime, BigInteger, text, Enum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..database.base import Base
@@ -55,12 +55,22 @@ class EntityType(str, enum.Enum):
 
 class ComplianceRecord(Base):
     __tablename__ = "compliance_records"
+    __table_args__ = (
+        # Keyset pagination order for list endpoints, overall and per status
+        Index("ix_compliance_records_created_at_record_id", "created_at", "record_id"),
+        Index("ix_compliance_records_status_created_at", "compliance_status", "created_at", "record_id"),
+        # Records the overdue sweeper may move to Non-Compliant
+        Index(
+            "ix_compliance_records_pending_due_date", "due_date",
+            postgresql_where=text("compliance_status = 'Pending Review'")
+        ),
+    )
 
     record_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    entity_type = Column(String, nullable=False)
+    entity_type = Column(String, nullable=False, index=True)
     
     # Foreign keys for different entity types
-    lp_id = Column(UUID(as_uuid=True), ForeignKey("lp_details.lp_id"), nullable=True)
+    lp_id = Column(UUID(as_uuid=True), ForeignKey("lp_details.lp_id"), nullable=True, index=True)
     # Add other entity foreign keys as needed (e.g., fund_id, portfolio_id)
     
     compliance_type = Column(String, nullable=False)  # KYC, AML, Tax, etc.
@@ -80,3 +90,18 @@ class ComplianceRecord(Base):
         super().__init__(**kwargs)
         if not self.record_id:
             self.record_id = uuid.uuid4()
+
+
+class ComplianceStats(Base):
+    """
+    Record counts per (entity_type, compliance_type, compliance_status).
+
+    Kept in step with compliance_records by the compliance API handlers, in
+    the same transaction as the record change; see app.utils.compliance_stats.
+    """
+    __tablename__ = "compliance_stats"
+
+    entity_type = Column(String, primary_key=True)
+    compliance_type = Column(String, primary_key=True)
+    compliance_status = Column(String, primary_key=True)
+    record_count = Column(BigInteger, nullable=False, server_default=text('0'))
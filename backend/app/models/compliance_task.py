@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, text
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..database.base import Base
@@ -20,15 +20,34 @@ class TaskCategory(str, enum.Enum):
 
 class ComplianceTask(Base):
     __tablename__ = "compliance_tasks"
+    __table_args__ = (
+        Index("ix_compliance_tasks_state_deadline", "state", "deadline"),
+        # Overdue checks only ever look at tasks that are not completed
+        Index(
+            "ix_compliance_tasks_open_deadline", "deadline",
+            postgresql_where=text("state <> 'Completed'")
+        ),
+        # Tasks the overdue sweeper has yet to look at
+        Index(
+            "ix_compliance_tasks_sweep_deadline", "deadline",
+            postgresql_where=text("state NOT IN ('Completed', 'Overdue')")
+        ),
+        # One row per occurrence of a recurring series; the materializer
+        # relies on it to make reruns insert nothing twice
+        Index("uq_compliance_tasks_series_occurrence", "series_id", "occurrence_date", unique=True),
+    )
 
     compliance_task_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     description = Column(String, nullable=False)
     deadline = Column(DateTime(timezone=True), nullable=False)
     recurrence = Column(String, nullable=True)
-    dependent_task_id = Column(UUID(as_uuid=True), ForeignKey('compliance_tasks.compliance_task_id'), nullable=True)
+    # Set on occurrences materialized from a recurring template task
+    series_id = Column(UUID(as_uuid=True), ForeignKey('compliance_tasks.compliance_task_id'), nullable=True)
+    occurrence_date = Column(Date, nullable=True)
+    dependent_task_id = Column(UUID(as_uuid=True), ForeignKey('compliance_tasks.compliance_task_id'), nullable=True, index=True)
     state = Column(String, nullable=False, server_default=TaskState.OPEN.value)
     category = Column(String, nullable=False)
-    assignee_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=False)
+    assignee_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=False, index=True)
     reviewer_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=True)
     approver_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id'), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=text('now()'))
@@ -38,7 +57,7 @@ class ComplianceTask(Base):
     assignee = relationship("User", foreign_keys=[assignee_id])
     reviewer = relationship("User", foreign_keys=[reviewer_id])
     approver = relationship("User", foreign_keys=[approver_id])
-    dependent_task = relationship("ComplianceTask", remote_side=[compliance_task_id])
+    dependent_task = relationship("ComplianceTask", remote_side=[compliance_task_id], foreign_keys=[dependent_task_id])
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, text, Date
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, text, Date
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database.base import Base
@@ -20,6 +20,13 @@ class DocumentCategory(str, enum.Enum):
 
 class Document(Base):
     __tablename__ = "documents"
+    # Created by migration 003; declared here so create_all() matches
+    __table_args__ = (
+        Index("idx_document_name", "name"),
+        Index("idx_document_category", "category"),
+        Index("idx_document_status", "status"),
+        Index("idx_document_date_uploaded", "date_uploaded"),
+    )
 
     document_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
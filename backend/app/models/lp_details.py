@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Numeric, Boolean, ForeignKey, Text, DateTime, text
+from sqlalchemy import Column, String, Date, Numeric, Boolean, ForeignKey, Text, DateTime, text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..database.base import Base
@@ -7,6 +7,8 @@ from datetime import datetime
 
 class LPDetails(Base):
     __tablename__ = "lp_details"
+    # Keyset pagination order for list endpoints
+    __table_args__ = (Index("ix_lp_details_created_at_lp_id", "created_at", "lp_id"),)
 
     lp_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     lp_name = Column(String, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, Numeric, ForeignKey, Text, DateTime, text
+from sqlalchemy import Column, String, Date, Numeric, ForeignKey, Text, DateTime, text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from ..database.base import Base
@@ -7,9 +7,25 @@ from datetime import datetime
 
 class LPDrawdown(Base):
     __tablename__ = "lp_drawdowns"
+    __table_args__ = (
+        # Keyset pagination order for list endpoints, overall and per LP
+        Index("ix_lp_drawdowns_created_at_drawdown_id", "created_at", "drawdown_id"),
+        Index("ix_lp_drawdowns_lp_id_created_at", "lp_id", "created_at", "drawdown_id"),
+        Index("ix_lp_drawdowns_status_due_date", "payment_status", "payment_due_date"),
+        # Outstanding payments, scanned by due date
+        Index(
+            "ix_lp_drawdowns_unpaid_due_date", "payment_due_date",
+            postgresql_where=text("payment_status <> 'Received'")
+        ),
+        # Drawdowns the overdue sweeper has yet to look at
+        Index(
+            "ix_lp_drawdowns_sweep_due_date", "payment_due_date",
+            postgresql_where=text("payment_status NOT IN ('Received', 'Overdue')")
+        ),
+    )
 
     drawdown_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    lp_id = Column(UUID(as_uuid=True), ForeignKey("lp_details.lp_id"), nullable=False)
+    lp_id = Column(UUID(as_uuid=True), ForeignKey("lp_details.lp_id"), nullable=False, index=True)
     drawdown_date = Column(Date, nullable=False)
     amount = Column(Numeric(15, 2), nullable=False)
     drawdown_percentage = Column(Numeric(5, 2))  # Percentage of total commitment
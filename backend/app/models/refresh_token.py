@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from ..database.base import Base
+import uuid
+
+class RefreshToken(Base):
+    """
+    Long-lived, revocable refresh token. Only a SHA-256 digest of the token
+    is stored, so a database leak does not expose usable tokens.
+    """
+    __tablename__ = "refresh_tokens"
+
+    token_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=text('now()'))
+
+    # Relationships
+    user = relationship("User")
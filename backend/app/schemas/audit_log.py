@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from uuid import UUID
+
+
+class AuditLogResponse(BaseModel):
+    log_id: UUID
+    user_id: Optional[UUID] = None
+    activity: str
+    timestamp: datetime
+    details: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AuditLogPage(BaseModel):
+    """One page of audit log entries, newest first"""
+    entries: List[AuditLogResponse]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
@@ -15,6 +15,14 @@ class EntityTypeEnum(str, Enum):
     LP = "LP"
     PORTFOLIO = "Portfolio"
 
+class StatsGroupByEnum(str, Enum):
+    ENTITY_TYPE = "entity_type"
+    COMPLIANCE_TYPE = "compliance_type"
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
 class ComplianceRecordBase(BaseModel):
     entity_type: EntityTypeEnum
     lp_id: Optional[UUID] = None
@@ -44,3 +52,30 @@ class ComplianceRecordResponse(ComplianceRecordBase):
 class ComplianceRecordList(BaseModel):
     records: List[ComplianceRecordResponse]
     total: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+class ComplianceImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ComplianceImportResult(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[ComplianceImportError]
+
+class ComplianceRecordFilter(BaseModel):
+    entity_type: Optional[EntityTypeEnum] = None
+    lp_id: Optional[UUID] = None
+    compliance_type: Optional[str] = None
+    compliance_status: Optional[ComplianceStatusEnum] = None
+    due_before: Optional[datetime] = None
+
+class ComplianceBulkStatusUpdate(BaseModel):
+    record_ids: Optional[List[UUID]] = None
+    filter: Optional[ComplianceRecordFilter] = None
+    compliance_status: ComplianceStatusEnum
+    comments: Optional[str] = None
+
+class ComplianceBulkStatusResult(BaseModel):
+    updated: int
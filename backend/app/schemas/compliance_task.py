@@ -1,6 +1,6 @@
 from pydantic import BaseModel, UUID4
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 from enum import Enum
 
 class TaskState(str, Enum):
@@ -44,6 +44,24 @@ class ComplianceTaskResponse(ComplianceTaskBase):
     state: TaskState
     created_at: datetime
     updated_at: datetime
+    # Set on occurrences materialized from a recurring task
+    series_id: Optional[UUID4] = None
+    occurrence_date: Optional[date] = None
 
     class Config:
         from_attributes = True
+
+class TaskDependencyStatus(BaseModel):
+    compliance_task_id: UUID4
+    ready: bool
+    # Incomplete tasks in this task's dependency chain, nearest first
+    blocked_by: List[UUID4]
+
+class TaskOccurrence(BaseModel):
+    occurrence_date: date
+    deadline: datetime
+    state: TaskState
+    # False for occurrences beyond the materialization horizon, which
+    # have no task row yet
+    materialized: bool
+    compliance_task_id: Optional[UUID4] = None
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from datetime import date
+from enum import Enum
 
 
 class TaskStats(BaseModel):
@@ -10,3 +12,28 @@ class TaskStats(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class TrendPeriodEnum(str, Enum):
+    WEEK = "week"
+    MONTH = "month"
+
+
+class TaskTrendCounts(BaseModel):
+    """Tasks created, completed and gone overdue within one bucket"""
+    created: int = 0
+    completed: int = 0
+    overdue: int = 0
+
+
+class TaskTrendBucket(BaseModel):
+    """One week or month of the task trend report"""
+    start: date
+    total: TaskTrendCounts
+    by_category: Dict[str, TaskTrendCounts]
+
+
+class TaskTrend(BaseModel):
+    """Schema for the time-bucketed task trend report"""
+    period: TrendPeriodEnum
+    buckets: List[TaskTrendBucket]
@@ -1,33 +1,222 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.audit_log import AuditLog
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from collections import deque
+from datetime import datetime, timezone
+import asyncio
+import logging
+import os
+import threading
 import uuid
 
-def log_activity(
+logger = logging.getLogger(__name__)
+
+# Buffered entries are written in one multi-row INSERT once this many are
+# queued, or every AUDIT_FLUSH_INTERVAL_SECONDS, whichever comes first
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+# Oldest entries are dropped beyond this if the database stays unreachable
+AUDIT_MAX_BUFFER = int(os.getenv("AUDIT_MAX_BUFFER", "10000"))
+
+
+class AuditBuffer:
+    """
+    In-memory queue of audit entries flushed in batches by a background task.
+
+    Entries get their log_id and timestamp when queued, so batching does not
+    change what is recorded, only when it is written. Until ``start`` is
+    called (or after ``stop``) the buffer is inactive and ``log_activity``
+    writes synchronously.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._entries: deque = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._engine = None
+        self.queued = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @property
+    def active(self) -> bool:
+        return self._task is not None
+
+    def start(self, engine) -> None:
+        """Start flushing to ``engine`` (an AsyncEngine) from the running event loop."""
+        self._engine = engine
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and write out everything still queued."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        while self._entries:
+            if not await self.flush():
+                break
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_buffer:
+                self._entries.popleft()
+                self.dropped += 1
+            self._entries.append(entry)
+            self.queued += 1
+            full = len(self._entries) >= self.batch_size
+        if full and self._loop is not None:
+            # May be called from a threadpool dependency, not just the loop
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            count = min(len(self._entries), self.batch_size)
+            return [self._entries.popleft() for _ in range(count)]
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries.extendleft(reversed(batch))
+            while len(self._entries) > self.max_buffer:
+                self._entries.popleft()
+                self.dropped += 1
+
+    async def flush(self) -> bool:
+        """Write one batch; returns False if the write failed and the batch was requeued."""
+        batch = self._take()
+        if not batch:
+            return True
+        try:
+            async with self._engine.begin() as conn:
+                await conn.execute(insert(AuditLog.__table__), batch)
+        except Exception:
+            logger.exception("Failed to write %d audit log entries", len(batch))
+            self.failures += 1
+            self._requeue(batch)
+            return False
+        self.flushed += len(batch)
+        self.batches += 1
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Drain full batches back to back, then wait for the next trigger
+            while self._entries and await self.flush() and len(self._entries) >= self.batch_size:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self.active,
+                "pending": len(self._entries),
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "failures": self.failures,
+                "dropped": self.dropped,
+            }
+
+
+audit_buffer = AuditBuffer(
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_interval=AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_buffer=AUDIT_MAX_BUFFER
+)
+
+
+def stage_activity(
     db: Session,
     activity: str,
     user_id: Optional[uuid.UUID] = None,
     details: Optional[str] = None
 ) -> AuditLog:
     """
-    Create an audit log entry for user activity.
-    
+    Add an audit log entry to the session's open transaction without committing.
+
+    Use this from endpoints that change data: the caller's single
+    ``db.commit()`` then writes the change and its audit entry together,
+    so neither can be persisted without the other.
+
     Args:
-        db: Database session
-        activity: Description of the activity (e.g., "document_upload", "login")
+        db: Database session holding the change being audited
+        activity: Description of the activity (e.g., "lp_created")
         user_id: UUID of the user performing the action (None for system actions)
         details: Additional details about the activity (JSON or text)
-    
+
     Returns:
-        The created AuditLog instance
+        The staged AuditLog instance
     """
     audit_log = AuditLog(
+        log_id=uuid.uuid4(),
         user_id=user_id,
         activity=activity,
+        timestamp=datetime.now(timezone.utc),
         details=details
     )
-    
     db.add(audit_log)
+    return audit_log
+
+
+def log_activity(
+    db: Session,
+    activity: str,
+    user_id: Optional[uuid.UUID] = None,
+    details: Optional[str] = None,
+    durable: bool = False
+) -> AuditLog:
+    """
+    Create an audit log entry for user activity that has no transaction of its own.
+
+    Activity that goes with a data change should use ``stage_activity`` instead.
+
+    Args:
+        db: Database session
+        activity: Description of the activity (e.g., "document_upload", "login")
+        user_id: UUID of the user performing the action (None for system actions)
+        details: Additional details about the activity (JSON or text)
+        durable: Commit the entry before returning instead of queueing it
+            on the audit buffer
+
+    Returns:
+        The AuditLog instance; when buffered it is not yet persisted
+    """
+    if not durable and audit_buffer.active:
+        audit_log = AuditLog(
+            log_id=uuid.uuid4(),
+            user_id=user_id,
+            activity=activity,
+            timestamp=datetime.now(timezone.utc),
+            details=details
+        )
+        audit_buffer.add({
+            "log_id": audit_log.log_id,
+            "user_id": user_id,
+            "activity": activity,
+            "timestamp": audit_log.timestamp,
+            "details": details,
+        })
+        return audit_log
+
+    audit_log = stage_activity(db, activity, user_id, details)
     db.commit()
     db.refresh(audit_log)
     return audit_log
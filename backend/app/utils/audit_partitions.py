@@ -0,0 +1,257 @@
+"""
+Monthly partition maintenance for the range-partitioned audit_logs table.
+
+``ensure_partitions`` creates the current month's partition and the next
+AUDIT_PARTITION_MONTHS_AHEAD months. ``archive_expired_partitions`` detaches
+partitions older than AUDIT_RETENTION_MONTHS, writes each to a gzipped CSV
+under AUDIT_ARCHIVE_DIR and drops it. ``sweep_default_partition`` does the
+same for rows past the window that landed in the default partition, which
+cannot be detached on its own. ``run_maintenance`` does all three under an
+advisory lock so only one worker does it at a time;
+``maintenance_loop`` repeats it in the background of the API process.
+
+Run from cron with:
+    python -m app.utils.audit_partitions
+"""
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import gzip
+import logging
+import os
+import re
+import shutil
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "3"))
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "12"))
+AUDIT_ARCHIVE_DIR = Path(os.getenv("AUDIT_ARCHIVE_DIR", "archive/audit_logs"))
+AUDIT_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("AUDIT_MAINTENANCE_INTERVAL_SECONDS", str(6 * 3600)))
+
+PARENT_TABLE = "audit_logs"
+DEFAULT_PARTITION = "audit_logs_default"
+_PARTITION_NAME = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+# Arbitrary constant shared by every worker running maintenance
+_ADVISORY_LOCK_ID = 7_240_331
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"audit_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def partition_ddl(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def ensure_partitions(conn: Connection, today: Optional[date] = None, months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create any missing monthly partitions from this month to ``months_ahead`` months out.
+
+    Returns:
+        Names of the partitions that did not exist before
+    """
+    current = month_start(today or date.today())
+    existing = set(_monthly_partitions(conn))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name not in existing:
+            conn.execute(text(partition_ddl(month)))
+            created.append(name)
+    if created:
+        logger.info("Created audit log partitions: %s", ", ".join(created))
+    return created
+
+
+def _monthly_partitions(conn: Connection) -> Dict[str, bool]:
+    """Map every monthly partition table, attached or not, to whether it is attached."""
+    rows = conn.execute(text(
+        "SELECT c.relname, i.inhparent IS NOT NULL AS attached "
+        "FROM pg_class c "
+        "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+        "AND i.inhparent = CAST(:parent AS regclass) "
+        "WHERE c.relkind IN ('r', 'p') AND c.relname LIKE 'audit\\_logs\\_y%'"
+    ), {"parent": PARENT_TABLE})
+    return {name: attached for name, attached in rows if partition_month(name)}
+
+
+def expired_partitions(conn: Connection, today: Optional[date] = None, retention_months: int = AUDIT_RETENTION_MONTHS) -> List[Tuple[str, bool]]:
+    """
+    List partitions whose whole month is older than the retention window.
+
+    Returns:
+        ``(name, attached)`` pairs, oldest first
+    """
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    partitions = _monthly_partitions(conn)
+    return sorted(
+        ((name, attached) for name, attached in partitions.items() if partition_month(name) < cutoff),
+        key=lambda item: item[0]
+    )
+
+
+def _copy_to_archive(cursor, query: str, target: Path) -> None:
+    """
+    Stream ``query`` to ``target`` as gzipped CSV.
+
+    The file is written under a temporary name and renamed once complete,
+    so a crash never leaves a truncated archive that looks finished.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".partial")
+    with gzip.open(partial, "wb") as out:
+        cursor.copy_expert(f"COPY {query} TO STDOUT WITH (FORMAT csv, HEADER)", out)
+    with open(partial, "rb") as f:
+        os.fsync(f.fileno())
+    shutil.move(str(partial), str(target))
+
+
+def archive_partition(engine: Engine, name: str, archive_dir: Path = AUDIT_ARCHIVE_DIR) -> Path:
+    """Copy a detached partition to ``<archive_dir>/<name>.csv.gz``."""
+    target = archive_dir / f"{name}.csv.gz"
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        _copy_to_archive(cursor, name, target)
+        cursor.close()
+        raw.commit()
+    finally:
+        raw.close()
+    return target
+
+
+def sweep_default_partition(
+    engine: Engine,
+    today: Optional[date] = None,
+    retention_months: int = AUDIT_RETENTION_MONTHS,
+    archive_dir: Path = AUDIT_ARCHIVE_DIR
+) -> Optional[Path]:
+    """
+    Archive and delete default-partition rows older than the retention window.
+
+    Rows only land in the default partition when no monthly partition
+    covered their timestamp, and it can never expire as a whole, so its
+    old rows are copied out and deleted instead of detached. The copy and
+    the delete run in one REPEATABLE READ transaction, so exactly the rows
+    written to the archive are deleted; the delete is committed only after
+    the archive is on disk.
+
+    Returns:
+        Path of the archive written, or None if there was nothing to sweep
+    """
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    expired = f"{DEFAULT_PARTITION} WHERE timestamp < '{cutoff.isoformat()}'"
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {expired})")
+        if not cursor.fetchone()[0]:
+            raw.rollback()
+            return None
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        target = archive_dir / f"{DEFAULT_PARTITION}_before_{cutoff.isoformat()}_{stamp}.csv.gz"
+        _copy_to_archive(cursor, f"(SELECT * FROM {expired})", target)
+        cursor.execute(f"DELETE FROM {expired}")
+        cursor.close()
+        raw.commit()
+    finally:
+        raw.close()
+    logger.info("Swept expired rows from %s to %s", DEFAULT_PARTITION, target)
+    return target
+
+
+def archive_expired_partitions(
+    engine: Engine,
+    today: Optional[date] = None,
+    retention_months: int = AUDIT_RETENTION_MONTHS,
+    archive_dir: Path = AUDIT_ARCHIVE_DIR
+) -> List[Path]:
+    """
+    Detach, archive and drop every partition past the retention window.
+
+    A partition that fails to archive stays detached (out of the hot
+    table, data intact) and is retried on the next run.
+
+    Returns:
+        Paths of the archives written
+    """
+    with engine.begin() as conn:
+        expired = expired_partitions(conn, today, retention_months)
+
+    archived = []
+    for name, attached in expired:
+        if attached:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        try:
+            path = archive_partition(engine, name, archive_dir)
+        except Exception:
+            logger.exception("Failed to archive audit log partition %s; left detached", name)
+            continue
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE {name}"))
+        logger.info("Archived audit log partition %s to %s", name, path)
+        archived.append(path)
+    return archived
+
+
+def run_maintenance(engine: Engine, today: Optional[date] = None) -> Dict[str, list]:
+    """
+    Create upcoming partitions and archive expired ones, including expired
+    rows in the default partition, unless another worker is already doing so.
+    """
+    with engine.connect() as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID}).scalar():
+            return {"created": [], "archived": []}
+        try:
+            with engine.begin() as conn:
+                created = ensure_partitions(conn, today)
+            archived = archive_expired_partitions(engine, today)
+            swept = sweep_default_partition(engine, today)
+            if swept:
+                archived.append(swept)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            lock_conn.commit()
+    return {"created": created, "archived": [str(p) for p in archived]}
+
+
+async def maintenance_loop(engine: Engine, interval: float = AUDIT_MAINTENANCE_INTERVAL_SECONDS) -> None:
+    """Run ``run_maintenance`` now and then every ``interval`` seconds, off the event loop."""
+    while True:
+        try:
+            await asyncio.to_thread(run_maintenance, engine)
+        except Exception:
+            logger.exception("Audit log partition maintenance failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    from app.database.base import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(run_maintenance(engine))
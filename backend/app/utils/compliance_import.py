@@ -0,0 +1,214 @@
+"""
+Bulk import of compliance records from CSV or NDJSON.
+
+The request body is spooled to a temporary file, then read row by row.
+Rows are validated with ``ComplianceRecordCreate`` in chunks of
+COMPLIANCE_IMPORT_CHUNK_ROWS. Each chunk of valid rows is COPYed into a
+temporary staging table. One INSERT ... SELECT then moves everything
+into compliance_records, and the compliance_stats counters are adjusted
+per bucket. All of this happens in the caller's transaction.
+"""
+from dataclasses import dataclass, field
+from io import StringIO, TextIOWrapper
+from itertools import islice
+from tempfile import TemporaryFile
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import json
+import os
+import uuid
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.schemas.compliance import ComplianceRecordCreate, ImportFormat
+from app.utils.compliance_stats import adjust_counts
+
+COMPLIANCE_IMPORT_CHUNK_ROWS = int(os.getenv("COMPLIANCE_IMPORT_CHUNK_ROWS", "5000"))
+COMPLIANCE_IMPORT_MAX_BYTES = int(os.getenv("COMPLIANCE_IMPORT_MAX_BYTES", str(200 * 1024 * 1024)))
+# Rejected rows beyond this are counted but not itemised in the response
+COMPLIANCE_IMPORT_MAX_ERRORS = int(os.getenv("COMPLIANCE_IMPORT_MAX_ERRORS", "1000"))
+
+STAGING_TABLE = "compliance_records_import"
+STAGING_COLUMNS = (
+    "row_number", "record_id", "entity_type", "lp_id",
+    "compliance_type", "compliance_status", "due_date", "comments"
+)
+# Distinguishes NULL from an empty string in the COPY stream
+_NULL = "\\N"
+
+# (row number, parsed fields, parse error)
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def reject(self, row: int, messages: List[str]) -> None:
+        self.rejected += 1
+        if len(self.errors) < COMPLIANCE_IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "errors": messages})
+
+
+async def spool_request_body(request: Request, max_bytes: int = COMPLIANCE_IMPORT_MAX_BYTES) -> BinaryIO:
+    """
+    Copy the request body into a temporary file as it arrives.
+
+    A plain TemporaryFile rather than a SpooledTemporaryFile: before
+    Python 3.11 the spooled one lacks ``readable()``, which
+    ``TextIOWrapper`` in ``iter_rows`` needs.
+
+    Raises:
+        HTTPException: 413 if the body is larger than ``max_bytes``
+    """
+    spool = TemporaryFile()
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            spool.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Import is larger than {max_bytes} bytes"
+            )
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def iter_rows(stream: BinaryIO, import_format: ImportFormat) -> Iterator[ParsedRow]:
+    """
+    Parse rows from a CSV (with a header row) or NDJSON stream.
+
+    Rows are numbered from 1: data rows after the header for CSV, lines
+    for NDJSON. Empty CSV cells are treated as missing fields.
+    """
+    reader = TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if import_format == ImportFormat.CSV:
+        for number, row in enumerate(csv.DictReader(reader), start=1):
+            yield number, {key: value for key, value in row.items() if key and value not in (None, "")}, None
+        return
+
+    for number, line in enumerate(reader, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        if not isinstance(data, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, data, None
+
+
+def _error_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    ]
+
+
+def stage_chunk(rows: Iterable[ParsedRow], result: ImportResult) -> str:
+    """
+    Validate a chunk of parsed rows and render the valid ones for COPY.
+
+    Invalid rows are recorded on ``result``.
+
+    Returns:
+        CSV text in ``STAGING_COLUMNS`` order
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for number, data, parse_error in rows:
+        if parse_error:
+            result.reject(number, [parse_error])
+            continue
+        try:
+            record = ComplianceRecordCreate(**data)
+        except ValidationError as e:
+            result.reject(number, _error_messages(e))
+            continue
+        writer.writerow([
+            number,
+            uuid.uuid4(),
+            record.entity_type.value,
+            record.lp_id if record.lp_id else _NULL,
+            record.compliance_type,
+            record.compliance_status.value,
+            record.due_date.isoformat() if record.due_date else _NULL,
+            record.comments if record.comments is not None else _NULL,
+        ])
+    return buffer.getvalue()
+
+
+def import_records(
+    db: Session,
+    stream: BinaryIO,
+    import_format: ImportFormat,
+    user_id: Optional[uuid.UUID]
+) -> ImportResult:
+    """
+    Load every valid row of ``stream`` into compliance_records.
+
+    Nothing is committed; the caller commits (or rolls back) the import
+    together with its audit entry.
+
+    Raises:
+        HTTPException: 400 if the body is not UTF-8 or not parseable as CSV
+    """
+    result = ImportResult()
+    conn = db.connection()
+    conn.execute(text(
+        f"CREATE TEMP TABLE {STAGING_TABLE} ("
+        "row_number integer, record_id uuid, entity_type text, lp_id uuid, "
+        "compliance_type text, compliance_status text, due_date timestamptz, comments text"
+        ") ON COMMIT DROP"
+    ))
+    cursor = conn.connection.cursor()
+    copy_sql = f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')"
+
+    rows = iter_rows(stream, import_format)
+    try:
+        while True:
+            chunk = list(islice(rows, COMPLIANCE_IMPORT_CHUNK_ROWS))
+            if not chunk:
+                break
+            staged = stage_chunk(chunk, result)
+            if staged:
+                cursor.copy_expert(copy_sql, StringIO(staged))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unreadable import: {e}")
+    finally:
+        cursor.close()
+
+    # Foreign keys are checked as a set rather than failing the whole INSERT
+    missing_lps = conn.execute(text(
+        f"DELETE FROM {STAGING_TABLE} s WHERE s.lp_id IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM lp_details l WHERE l.lp_id = s.lp_id) "
+        "RETURNING s.row_number"
+    ))
+    for (number,) in missing_lps:
+        result.reject(number, ["lp_id: LP not found"])
+
+    result.imported = conn.execute(text(
+        "INSERT INTO compliance_records "
+        "(record_id, entity_type, lp_id, compliance_type, compliance_status, due_date, comments, updated_by) "
+        "SELECT record_id, entity_type, lp_id, compliance_type, compliance_status, due_date, comments, :user_id "
+        f"FROM {STAGING_TABLE} ORDER BY row_number"
+    ), {"user_id": user_id}).rowcount
+
+    buckets = conn.execute(text(
+        f"SELECT entity_type, compliance_type, compliance_status, count(*) FROM {STAGING_TABLE} "
+        "GROUP BY entity_type, compliance_type, compliance_status"
+    ))
+    adjust_counts(db, {(e, c, s): n for e, c, s, n in buckets})
+
+    result.errors.sort(key=lambda error: error["row"])
+    return result
@@ -0,0 +1,250 @@
+"""
+Compliance record counts for /api/compliance/stats.
+
+compliance_stats holds one counter per (entity_type, compliance_type,
+compliance_status), adjusted by the compliance API handlers in the same
+transaction as each record change. Check it against compliance_records
+(and fix any drift) with:
+    python -m app.utils.compliance_stats [--check]
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import logging
+import os
+import sys
+
+from sqlalchemy import delete, event, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.compliance_records import ComplianceRecord, ComplianceStats, ComplianceStatus
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Status counts per (entity_type filter), dropped whenever a record change commits
+COMPLIANCE_STATS_CACHE_TTL_SECONDS = int(os.getenv("COMPLIANCE_STATS_CACHE_TTL_SECONDS", "30"))
+
+compliance_stats_cache = TTLCache(maxsize=16, ttl=COMPLIANCE_STATS_CACHE_TTL_SECONDS)
+
+# Response key for each status bucket
+STATUS_KEYS = {
+    ComplianceStatus.COMPLIANT.value: "compliant",
+    ComplianceStatus.NON_COMPLIANT.value: "non_compliant",
+    ComplianceStatus.PENDING_REVIEW.value: "pending_review",
+    ComplianceStatus.EXEMPTED.value: "exempted",
+}
+
+# (entity_type, compliance_type, compliance_status)
+StatusKey = Tuple[str, str, str]
+# (entity_type, compliance_type, compliance_status, count)
+StatusCount = Tuple[str, str, str, int]
+
+
+def record_key(record: ComplianceRecord) -> StatusKey:
+    return (record.entity_type, record.compliance_type, record.compliance_status)
+
+
+def adjust_counts(db: Union[Session, Connection], changes: Dict[StatusKey, int]) -> None:
+    """
+    Apply count deltas to compliance_stats in the open transaction of ``db``.
+
+    Each bucket is upserted, so the first record of a new combination
+    creates its row. Buckets are touched in key order so that two
+    transactions moving records between the same buckets cannot deadlock.
+    """
+    for key in sorted(changes):
+        delta = changes[key]
+        if not delta:
+            continue
+        entity_type, compliance_type, compliance_status = key
+        stmt = pg_insert(ComplianceStats).values(
+            entity_type=entity_type,
+            compliance_type=compliance_type,
+            compliance_status=compliance_status,
+            record_count=delta
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[ComplianceStats.entity_type, ComplianceStats.compliance_type, ComplianceStats.compliance_status],
+            set_={"record_count": ComplianceStats.record_count + stmt.excluded.record_count}
+        ))
+
+
+def move_count(db: Session, old_key: Optional[StatusKey], new_key: Optional[StatusKey]) -> None:
+    """Count a record leaving ``old_key`` and/or entering ``new_key`` (None for create/delete)."""
+    changes: Dict[StatusKey, int] = {}
+    if old_key is not None:
+        changes[old_key] = changes.get(old_key, 0) - 1
+    if new_key is not None:
+        changes[new_key] = changes.get(new_key, 0) + 1
+    adjust_counts(db, changes)
+
+
+async def fetch_status_counts(db: AsyncSession, entity_type: Optional[str] = None) -> List[StatusCount]:
+    """
+    Read the per-bucket record counts from compliance_stats.
+
+    The table has one row per (entity type, compliance type, status), so
+    this costs the same however many records there are. Results are
+    cached for COMPLIANCE_STATS_CACHE_TTL_SECONDS.
+    """
+    cached = compliance_stats_cache.get(entity_type)
+    if cached is not None:
+        return cached
+
+    query = select(
+        ComplianceStats.entity_type,
+        ComplianceStats.compliance_type,
+        ComplianceStats.compliance_status,
+        ComplianceStats.record_count
+    ).where(ComplianceStats.record_count > 0)
+    if entity_type:
+        query = query.where(ComplianceStats.entity_type == entity_type)
+
+    rows = [tuple(row) for row in (await db.execute(query)).all()]
+    compliance_stats_cache.set(entity_type, rows)
+    return rows
+
+
+def count_from_records(conn: Connection) -> Dict[StatusKey, int]:
+    """Count compliance_records per bucket from scratch with one GROUP BY."""
+    rows = conn.execute(select(
+        ComplianceRecord.entity_type,
+        ComplianceRecord.compliance_type,
+        ComplianceRecord.compliance_status,
+        func.count()
+    ).group_by(
+        ComplianceRecord.entity_type,
+        ComplianceRecord.compliance_type,
+        ComplianceRecord.compliance_status
+    ))
+    return {(e, c, s): n for e, c, s, n in rows}
+
+
+def find_drift(conn: Connection) -> Dict[StatusKey, Tuple[int, int]]:
+    """
+    Compare compliance_stats with a fresh count of compliance_records.
+
+    Returns:
+        ``{bucket: (stored, actual)}`` for every bucket that disagrees
+    """
+    actual = count_from_records(conn)
+    stored = {
+        (e, c, s): n for e, c, s, n in conn.execute(select(
+            ComplianceStats.entity_type,
+            ComplianceStats.compliance_type,
+            ComplianceStats.compliance_status,
+            ComplianceStats.record_count
+        ))
+    }
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in stored.keys() | actual.keys()
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+
+def rebuild(engine: Engine) -> Dict[StatusKey, Tuple[int, int]]:
+    """
+    Recompute compliance_stats from compliance_records.
+
+    Record writes are blocked for the duration (SHARE lock) so no change
+    lands between the count and the swap.
+
+    Returns:
+        The drift that was corrected, as returned by ``find_drift``
+    """
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE compliance_records IN SHARE MODE"))
+        drift = find_drift(conn)
+        if drift:
+            conn.execute(delete(ComplianceStats))
+            counts = count_from_records(conn)
+            if counts:
+                conn.execute(insert(ComplianceStats), [
+                    {"entity_type": e, "compliance_type": c, "compliance_status": s, "record_count": n}
+                    for (e, c, s), n in counts.items()
+                ])
+    compliance_stats_cache.clear()
+    return drift
+
+
+def summarize(counts: Iterable[StatusCount]) -> Dict[str, Any]:
+    """Fold status counts into the totals returned by /api/compliance/stats."""
+    summary = {"total": 0, **{key: 0 for key in STATUS_KEYS.values()}}
+    for _, _, status, count in counts:
+        summary["total"] += count
+        key = STATUS_KEYS.get(status)
+        if key:
+            summary[key] += count
+    total = summary["total"]
+    summary["compliance_rate"] = (summary["compliant"] / total * 100) if total > 0 else 0
+    return summary
+
+
+def build_stats(counts: Sequence[StatusCount], group_by: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Build the stats response, with a ``breakdown`` entry per distinct value
+    of the ``group_by`` fields when any are requested.
+    """
+    stats = summarize(counts)
+    if group_by:
+        groups: Dict[tuple, List[StatusCount]] = {}
+        for row in counts:
+            fields = {"entity_type": row[0], "compliance_type": row[1]}
+            groups.setdefault(tuple(fields[name] for name in group_by), []).append(row)
+        stats["breakdown"] = [
+            {**dict(zip(group_by, key)), **summarize(rows)}
+            for key, rows in sorted(groups.items())
+        ]
+    return stats
+
+
+# Session.info key set when a flush wrote ComplianceRecord rows
+_RECORDS_CHANGED = "compliance_records_changed"
+
+
+def _note_record_changes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, ComplianceRecord) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_RECORDS_CHANGED] = True
+
+
+def _invalidate_stats(session: Session) -> None:
+    # Only once the outermost transaction commits (after_commit also fires
+    # when a savepoint is released). Clearing at flush time let a concurrent
+    # /stats read re-cache the old counts before the change was visible.
+    if session.in_nested_transaction():
+        return
+    if session.info.pop(_RECORDS_CHANGED, False):
+        compliance_stats_cache.clear()
+
+
+def _forget_record_changes(session: Session, previous_transaction) -> None:
+    # A rolled back savepoint may leave earlier record changes to commit
+    if not previous_transaction.nested:
+        session.info.pop(_RECORDS_CHANGED, None)
+
+
+# ORM changes to records drop the cached counts once their transaction
+# commits. Core statements (import, bulk status, the sweeper) clear the
+# cache themselves after committing.
+event.listen(Session, "after_flush", _note_record_changes)
+event.listen(Session, "after_commit", _invalidate_stats)
+event.listen(Session, "after_soft_rollback", _forget_record_changes)
+
+
+if __name__ == "__main__":
+    from app.database.base import engine
+
+    logging.basicConfig(level=logging.INFO)
+    check_only = "--check" in sys.argv[1:]
+    if check_only:
+        with engine.connect() as conn:
+            drift = find_drift(conn)
+    else:
+        drift = rebuild(engine)
+    for (entity_type, compliance_type, status), (stored, actual) in sorted(drift.items()):
+        logger.warning("%s / %s / %s: stored %d, actual %d", entity_type, compliance_type, status, stored, actual)
+    print(f"{len(drift)} bucket(s) drifted" + ("" if check_only or not drift else ", rebuilt"))
+    sys.exit(1 if check_only and drift else 0)
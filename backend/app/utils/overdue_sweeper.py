@@ -0,0 +1,205 @@
+"""
+Periodic sweep that moves past-due rows to their overdue state.
+
+- compliance_tasks not Completed whose deadline has passed become Overdue
+- lp_drawdowns not Received whose payment_due_date has passed become Overdue
+- compliance_records still Pending Review after their due_date become
+  Non-Compliant (records have no separate overdue status)
+
+Each table is updated in batches of OVERDUE_SWEEP_BATCH_SIZE rows, one
+transaction per batch, picked through partial indexes that only contain
+rows not yet swept. ``run_sweep`` takes an advisory lock so only one
+worker sweeps at a time; ``sweep_loop`` repeats it in the background of
+the API process.
+
+Run once from cron with:
+    python -m app.utils.overdue_sweeper
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.audit_log import AuditLog
+from app.models.compliance_records import ComplianceStatus
+from app.models.compliance_task import TaskState
+from app.utils.compliance_stats import adjust_counts, compliance_stats_cache
+
+logger = logging.getLogger(__name__)
+
+OVERDUE_SWEEP_INTERVAL_SECONDS = float(os.getenv("OVERDUE_SWEEP_INTERVAL_SECONDS", "300"))
+OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv("OVERDUE_SWEEP_BATCH_SIZE", "1000"))
+
+DRAWDOWN_RECEIVED = "Received"
+DRAWDOWN_OVERDUE = "Overdue"
+# Arbitrary constant shared by every worker running the sweep
+_ADVISORY_LOCK_ID = 7_240_332
+
+
+def _sweep_tasks(conn: Connection, now: datetime, limit: int) -> int:
+    return conn.execute(text(
+        "UPDATE compliance_tasks SET state = :overdue, updated_at = now() "
+        "WHERE compliance_task_id IN ("
+        "  SELECT compliance_task_id FROM compliance_tasks"
+        "  WHERE state NOT IN (:completed, :overdue) AND deadline < :now"
+        "  ORDER BY deadline LIMIT :limit FOR UPDATE SKIP LOCKED"
+        ")"
+    ), {
+        "overdue": TaskState.OVERDUE.value,
+        "completed": TaskState.COMPLETED.value,
+        "now": now,
+        "limit": limit,
+    }).rowcount
+
+
+def _sweep_drawdowns(conn: Connection, now: datetime, limit: int) -> int:
+    return conn.execute(text(
+        "UPDATE lp_drawdowns SET payment_status = :overdue, updated_at = now() "
+        "WHERE drawdown_id IN ("
+        "  SELECT drawdown_id FROM lp_drawdowns"
+        "  WHERE payment_status NOT IN (:received, :overdue) AND payment_due_date < :today"
+        "  ORDER BY payment_due_date LIMIT :limit FOR UPDATE SKIP LOCKED"
+        ")"
+    ), {
+        "overdue": DRAWDOWN_OVERDUE,
+        "received": DRAWDOWN_RECEIVED,
+        "today": now.date(),
+        "limit": limit,
+    }).rowcount
+
+
+def _sweep_compliance_records(conn: Connection, now: datetime, limit: int) -> int:
+    pending = ComplianceStatus.PENDING_REVIEW.value
+    non_compliant = ComplianceStatus.NON_COMPLIANT.value
+    moved = conn.execute(text(
+        "WITH batch AS ("
+        "  SELECT record_id FROM compliance_records"
+        "  WHERE compliance_status = :pending AND due_date < :now"
+        "  ORDER BY due_date LIMIT :limit FOR UPDATE SKIP LOCKED"
+        "), moved AS ("
+        "  UPDATE compliance_records r"
+        "  SET compliance_status = :non_compliant, last_updated = now(), updated_at = now()"
+        "  FROM batch WHERE r.record_id = batch.record_id"
+        "  RETURNING r.entity_type, r.compliance_type"
+        ") SELECT entity_type, compliance_type, count(*) FROM moved GROUP BY entity_type, compliance_type"
+    ), {"pending": pending, "non_compliant": non_compliant, "now": now, "limit": limit}).all()
+
+    changes: Dict[tuple, int] = {}
+    for entity_type, compliance_type, count in moved:
+        changes[(entity_type, compliance_type, pending)] = -count
+        changes[(entity_type, compliance_type, non_compliant)] = count
+    adjust_counts(conn, changes)
+    return sum(count for _, _, count in moved)
+
+
+SWEEPS: Dict[str, Callable[[Connection, datetime, int], int]] = {
+    "compliance_tasks": _sweep_tasks,
+    "lp_drawdowns": _sweep_drawdowns,
+    "compliance_records": _sweep_compliance_records,
+}
+
+
+class SweepStats:
+    """Counters for the sweeps this process has run, published on /api/metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.skipped = 0
+        self.last_run: Optional[datetime] = None
+        self.last_changed: Dict[str, int] = {}
+        self.total_changed: Dict[str, int] = dict.fromkeys(SWEEPS, 0)
+
+    def record(self, changed: Dict[str, int], at: datetime) -> None:
+        with self._lock:
+            self.runs += 1
+            self.last_run = at
+            self.last_changed = dict(changed)
+            for table, count in changed.items():
+                self.total_changed[table] = self.total_changed.get(table, 0) + count
+
+    def record_skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "skipped": self.skipped,
+                "last_run": self.last_run.isoformat() if self.last_run else None,
+                "last_changed": dict(self.last_changed),
+                "total_changed": dict(self.total_changed),
+            }
+
+
+sweep_stats = SweepStats()
+
+
+def sweep_table(engine: Engine, sweep: Callable[[Connection, datetime, int], int], now: datetime, batch_size: int) -> int:
+    """Run one table's sweep in batches until a batch comes back short."""
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            changed = sweep(conn, now, batch_size)
+        total += changed
+        if changed < batch_size:
+            return total
+
+
+def run_sweep(engine: Engine, now: Optional[datetime] = None, batch_size: int = OVERDUE_SWEEP_BATCH_SIZE) -> Optional[Dict[str, int]]:
+    """
+    Sweep every table once, unless another worker is already doing so.
+
+    Returns:
+        Rows changed per table, or None if the sweep was skipped
+    """
+    now = now or datetime.now(timezone.utc)
+    with engine.connect() as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID}).scalar():
+            sweep_stats.record_skip()
+            return None
+        try:
+            changed = {table: sweep_table(engine, sweep, now, batch_size) for table, sweep in SWEEPS.items()}
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            lock_conn.commit()
+
+    if changed["compliance_records"]:
+        compliance_stats_cache.clear()
+    if any(changed.values()):
+        logger.info("Overdue sweep changed %s", changed)
+        with engine.begin() as conn:
+            conn.execute(insert(AuditLog.__table__).values(
+                log_id=uuid.uuid4(),
+                user_id=None,
+                activity="overdue_sweep",
+                timestamp=datetime.now(timezone.utc),
+                details=json.dumps(changed)
+            ))
+    sweep_stats.record(changed, now)
+    return changed
+
+
+async def sweep_loop(engine: Engine, interval: float = OVERDUE_SWEEP_INTERVAL_SECONDS) -> None:
+    """Run ``run_sweep`` now and then every ``interval`` seconds, off the event loop."""
+    while True:
+        try:
+            await asyncio.to_thread(run_sweep, engine)
+        except Exception:
+            logger.exception("Overdue sweep failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    from app.database.base import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(run_sweep(engine))
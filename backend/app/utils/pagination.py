@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional
+import base64
+import json
+import uuid
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT = "next"
+PREV = "prev"
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID, direction: str) -> str:
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(row_id), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode an opaque cursor into ``(created_at, row_id, direction)``.
+
+    Raises:
+        HTTPException: 400 if the cursor was not produced by ``encode_cursor``
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        direction = payload["d"]
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["c"]), uuid.UUID(payload["i"]), direction
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_query(
+    query: Select,
+    created_col,
+    id_col,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False
+) -> Select:
+    """
+    The statement ``keyset_page`` runs for these arguments: ``query``
+    bounded by the cursor, ordered on ``(created_col, id_col)`` and limited
+    to ``limit + 1`` rows. Also usable as the base of a page's ETag validator.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    key = tuple_(created_col, id_col)
+    direction = NEXT
+    if cursor:
+        created_at, row_id, direction = decode_cursor(cursor)
+    # Next pages of an ascending list (and prev pages of a descending one)
+    # scan the index upwards; the other two cases scan it downwards
+    ascending = (direction == NEXT) != descending
+    if cursor:
+        if ascending:
+            query = query.where(key > tuple_(created_at, row_id))
+        else:
+            query = query.where(key < tuple_(created_at, row_id))
+    elif skip:
+        query = query.offset(skip)
+
+    if ascending:
+        query = query.order_by(created_col.asc(), id_col.asc())
+    else:
+        query = query.order_by(created_col.desc(), id_col.desc())
+    # One extra row tells keyset_page whether another page exists in this direction
+    return query.limit(limit + 1)
+
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    created_col,
+    id_col,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False
+) -> Page:
+    """
+    Fetch one page of ``query`` ordered by ``(created_col, id_col)``.
+
+    With a cursor the page starts right after (or, for a prev cursor, ends
+    right before) the row it encodes, so Postgres seeks on the composite
+    index instead of scanning and discarding skipped rows. ``skip`` is the
+    deprecated OFFSET fallback and is ignored when a cursor is given.
+    ``descending`` pages newest first; cursors then walk the other way.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    direction = NEXT
+    if cursor:
+        created_at, row_id, direction = decode_cursor(cursor)
+    page_query = keyset_query(query, created_col, id_col, limit, cursor=cursor, skip=skip, descending=descending)
+
+    rows = list((await db.execute(page_query)).scalars().all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == PREV:
+        rows.reverse()
+
+    def cursor_for(row, to: str) -> str:
+        return encode_cursor(getattr(row, created_col.key), getattr(row, id_col.key), to)
+
+    page = Page(items=rows)
+    if rows:
+        first, last = rows[0], rows[-1]
+        if direction == NEXT:
+            page.next_cursor = cursor_for(last, NEXT) if has_more else None
+            page.prev_cursor = cursor_for(first, PREV) if cursor or skip else None
+        else:
+            page.prev_cursor = cursor_for(first, PREV) if has_more else None
+            page.next_cursor = cursor_for(last, NEXT)
+    elif cursor:
+        # Walked off the end: point back at the row the cursor came from
+        page.prev_cursor = encode_cursor(created_at, row_id, PREV) if direction == NEXT else None
+        page.next_cursor = encode_cursor(created_at, row_id, NEXT) if direction == PREV else None
+    return page
+
+
+def set_cursor_headers(response: Response, page: Page) -> None:
+    """Expose a page's cursors on list endpoints whose body is a bare JSON array."""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.prev_cursor:
+        response.headers["X-Prev-Cursor"] = page.prev_cursor
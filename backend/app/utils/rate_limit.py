@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+import threading
+import time
+
+
+class TokenBucketLimiter:
+    """
+    In-process token-bucket rate limiter keyed by an arbitrary hashable key.
+
+    Each key gets a bucket holding up to ``capacity`` tokens that refills at
+    ``refill_rate`` tokens per second. Buckets live in an LRU map capped at
+    ``max_keys``; a bucket untouched for ``idle_ttl`` seconds is dropped,
+    which loses nothing once ``idle_ttl`` exceeds the time to refill a bucket.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float, max_keys: int = 10000, idle_ttl: float = 600):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        # key -> [tokens, last_refill_monotonic]
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def _bucket(self, key: Hashable, now: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.capacity, now]
+            self._buckets[key] = bucket
+        else:
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        self._evict(now)
+        return bucket
+
+    def _evict(self, now: float) -> None:
+        # The least recently used buckets sit at the front of the map
+        while self._buckets:
+            oldest_key, (_, last_seen) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - last_seen < self.idle_ttl:
+                break
+            del self._buckets[oldest_key]
+            self.evicted += 1
+
+    def _retry_after(self, tokens: float, cost: float) -> float:
+        if self.refill_rate <= 0:
+            return float("inf")
+        return (cost - tokens) / self.refill_rate
+
+    def peek(self, key: Hashable, cost: float = 1.0) -> float:
+        """
+        Check whether ``cost`` tokens are available without consuming them.
+
+        Returns:
+            0 if the request may proceed, otherwise the seconds until it may
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._bucket(key, now)[0]
+            if tokens >= cost:
+                return 0.0
+            self.limited += 1
+            return self._retry_after(tokens, cost)
+
+    def consume(self, key: Hashable, cost: float = 1.0) -> float:
+        """
+        Take ``cost`` tokens from the key's bucket if they are available.
+
+        Returns:
+            0 if the tokens were taken, otherwise the seconds until they would be
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(key, now)
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                self.allowed += 1
+                return 0.0
+            self.limited += 1
+            return self._retry_after(bucket[0], cost)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "keys": len(self._buckets),
+                "max_keys": self.max_keys,
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "evicted": self.evicted,
+            }
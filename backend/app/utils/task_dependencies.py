@@ -0,0 +1,137 @@
+"""
+Dependency graph queries over ComplianceTask.dependent_task_id.
+
+A task's dependency chain is its dependent_task_id, that task's
+dependent_task_id, and so on. A task is blocked while any task in its
+chain is not Completed. Every question here is answered with a single
+recursive CTE rather than by walking the chain one query at a time.
+"""
+from typing import Dict, Iterable, List, Optional
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, bindparam, select, text
+from sqlalchemy.orm import Session, aliased
+
+from app.models.compliance_task import ComplianceTask, TaskState
+
+# Walks each requested task's chain, keeping the path so that a cycle
+# already in the data cannot make the recursion run forever
+_FRONTIER_SQL = text("""
+    WITH RECURSIVE chain(root, id, next_id, state, path) AS (
+        SELECT t.compliance_task_id, d.compliance_task_id, d.dependent_task_id, d.state,
+               ARRAY[t.compliance_task_id, d.compliance_task_id]
+        FROM compliance_tasks t
+        JOIN compliance_tasks d ON d.compliance_task_id = t.dependent_task_id
+        WHERE t.compliance_task_id IN :task_ids
+        UNION ALL
+        SELECT c.root, d.compliance_task_id, d.dependent_task_id, d.state, c.path || d.compliance_task_id
+        FROM chain c
+        JOIN compliance_tasks d ON d.compliance_task_id = c.next_id
+        WHERE d.compliance_task_id <> ALL(c.path)
+    )
+    SELECT r.compliance_task_id, c.id
+    FROM compliance_tasks r
+    LEFT JOIN chain c ON c.root = r.compliance_task_id AND c.state <> :completed
+    WHERE r.compliance_task_id IN :task_ids
+    ORDER BY r.compliance_task_id, cardinality(c.path)
+""").bindparams(bindparam("task_ids", expanding=True), completed=TaskState.COMPLETED.value)
+
+# UNION (not UNION ALL) stops at the first repeated link
+_CHAIN_SQL = text("""
+    WITH RECURSIVE chain(id, next_id) AS (
+        SELECT compliance_task_id, dependent_task_id FROM compliance_tasks
+        WHERE compliance_task_id = :dependency_id
+        UNION
+        SELECT t.compliance_task_id, t.dependent_task_id
+        FROM compliance_tasks t
+        JOIN chain c ON t.compliance_task_id = c.next_id
+    )
+    SELECT count(*) > 0, coalesce(bool_or(id = :task_id), false) FROM chain
+""")
+
+
+def check_dependency(db: Session, task_id: uuid.UUID, dependency_id: uuid.UUID) -> None:
+    """
+    Verify that ``task_id`` may depend on ``dependency_id``.
+
+    Raises:
+        HTTPException: 404 if the dependency does not exist, 400 if it is
+            the task itself or already depends on it, directly or not
+    """
+    if dependency_id == task_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A task cannot depend on itself")
+    exists, cycle = db.execute(_CHAIN_SQL, {"dependency_id": dependency_id, "task_id": task_id}).one()
+    if not exists:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dependent task not found")
+    if cycle:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Task dependency would create a cycle"
+        )
+
+
+def frontier_query(task_ids: Iterable[uuid.UUID]):
+    """Statement for ``collect_frontier``; runs on sync or async sessions."""
+    return _FRONTIER_SQL.bindparams(task_ids=list(task_ids))
+
+
+def collect_frontier(rows) -> Dict[uuid.UUID, List[uuid.UUID]]:
+    """
+    Fold ``frontier_query`` rows into ``{task_id: incomplete tasks in its chain}``.
+
+    Blockers are listed nearest first; an empty list means the task is
+    ready. Task ids that do not exist are absent from the result.
+    """
+    frontier: Dict[uuid.UUID, List[uuid.UUID]] = {}
+    for task_id, blocker_id in rows:
+        blockers = frontier.setdefault(task_id, [])
+        if blocker_id is not None:
+            blockers.append(blocker_id)
+    return frontier
+
+
+def blocked_task_ids() -> Select:
+    """Ids of every task with an incomplete task somewhere in its chain."""
+    task = aliased(ComplianceTask)
+    dependency = aliased(ComplianceTask)
+    blocked = (
+        select(task.compliance_task_id.label("task_id"))
+        .join(dependency, dependency.compliance_task_id == task.dependent_task_id)
+        .where(dependency.state != TaskState.COMPLETED.value)
+        .cte("blocked", recursive=True)
+    )
+    waiting = aliased(ComplianceTask)
+    blocked = blocked.union(
+        select(waiting.compliance_task_id).join(blocked, waiting.dependent_task_id == blocked.c.task_id)
+    )
+    return select(blocked.c.task_id)
+
+
+def dependent_task_ids(task_id: uuid.UUID) -> Select:
+    """Ids of every task whose chain passes through ``task_id``."""
+    dependents = (
+        select(ComplianceTask.compliance_task_id.label("task_id"))
+        .where(ComplianceTask.dependent_task_id == task_id)
+        .cte("dependents", recursive=True)
+    )
+    waiting = aliased(ComplianceTask)
+    dependents = dependents.union(
+        select(waiting.compliance_task_id).join(dependents, waiting.dependent_task_id == dependents.c.task_id)
+    )
+    return select(dependents.c.task_id)
+
+
+def filter_ready(query: Select, ready: Optional[bool]) -> Select:
+    """
+    Restrict a task query to ready tasks (not Completed, nothing blocking
+    them) for ``ready=True``, or to blocked ones for ``ready=False``.
+    """
+    if ready is None:
+        return query
+    if ready:
+        return query.where(
+            ComplianceTask.state != TaskState.COMPLETED.value,
+            ComplianceTask.compliance_task_id.not_in(blocked_task_ids())
+        )
+    return query.where(ComplianceTask.compliance_task_id.in_(blocked_task_ids()))
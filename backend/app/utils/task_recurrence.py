@@ -0,0 +1,391 @@
+"""
+Recurring compliance tasks.
+
+A task with a ``recurrence`` rule is the template of a series. Its own
+deadline is occurrence 0, and the rule gives the deadlines of the
+occurrences that follow. Rules are a subset of RFC 5545 RRULE or a
+shorthand name:
+
+    FREQ=MONTHLY;INTERVAL=3;COUNT=8;UNTIL=20281231
+    DAILY, WEEKLY, MONTHLY, QUARTERLY, HALF_YEARLY, YEARLY
+
+Monthly and yearly steps keep the template's day of month, clamped to
+the end of shorter months. Every occurrence is computed from the anchor,
+so a series that starts on the 31st never drifts to the 28th.
+
+Each distinct rule string is parsed once into a ``Schedule``.
+``materialize`` inserts the occurrences due within
+TASK_RECURRENCE_HORIZON_DAYS as ordinary task rows, with series_id and
+occurrence_date set. The inserts are multi-row and keyed on
+``(series_id, occurrence_date)`` with ON CONFLICT DO NOTHING. Reruns,
+and workers racing each other, therefore never duplicate an occurrence.
+Occurrences dated before today are never backfilled. Occurrences
+beyond the horizon are not stored; ``project_occurrences`` computes
+them when they are asked for.
+
+Run once from cron with:
+    python -m app.utils.task_recurrence
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import calendar
+import itertools
+import json
+import logging
+import os
+import threading
+import uuid
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import aliased
+
+from app.models.audit_log import AuditLog
+from app.models.compliance_task import ComplianceTask, TaskState
+
+logger = logging.getLogger(__name__)
+
+TASK_RECURRENCE_HORIZON_DAYS = int(os.getenv("TASK_RECURRENCE_HORIZON_DAYS", "90"))
+TASK_RECURRENCE_INTERVAL_SECONDS = float(os.getenv("TASK_RECURRENCE_INTERVAL_SECONDS", "3600"))
+TASK_RECURRENCE_BATCH_SIZE = int(os.getenv("TASK_RECURRENCE_BATCH_SIZE", "1000"))
+# Most occurrences a single lazy projection will compute
+MAX_PROJECTED_OCCURRENCES = 500
+
+DAYS = "days"
+MONTHS = "months"
+
+# FREQ value -> (unit, steps per interval)
+_FREQUENCIES = {
+    "DAILY": (DAYS, 1),
+    "WEEKLY": (DAYS, 7),
+    "MONTHLY": (MONTHS, 1),
+    "YEARLY": (MONTHS, 12),
+}
+
+_SHORTHANDS = {
+    "DAILY": "FREQ=DAILY",
+    "WEEKLY": "FREQ=WEEKLY",
+    "MONTHLY": "FREQ=MONTHLY",
+    "QUARTERLY": "FREQ=MONTHLY;INTERVAL=3",
+    "HALF_YEARLY": "FREQ=MONTHLY;INTERVAL=6",
+    "YEARLY": "FREQ=YEARLY",
+    "ANNUALLY": "FREQ=YEARLY",
+}
+
+# Columns copied from the template onto each occurrence
+_COPIED_COLUMNS = ("description", "category", "assignee_id", "reviewer_id", "approver_id")
+
+
+def shift_months(moment: datetime, months: int) -> datetime:
+    """``moment`` moved by whole months, clamping the day to the target month's length."""
+    index = moment.year * 12 + moment.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """A parsed recurrence rule, independent of any particular series."""
+
+    unit: str
+    step: int
+    count: Optional[int] = None
+    until: Optional[date] = None
+
+    def nth(self, anchor: datetime, n: int) -> datetime:
+        """Deadline of occurrence ``n``; occurrence 0 is ``anchor`` itself."""
+        if self.unit == DAYS:
+            return anchor + timedelta(days=self.step * n)
+        return shift_months(anchor, self.step * n)
+
+    def _first_index_after(self, anchor: datetime, day: date) -> int:
+        if day < anchor.date():
+            return 0
+        if self.unit == DAYS:
+            n = (day - anchor.date()).days // self.step
+        else:
+            n = ((day.year - anchor.year) * 12 + day.month - anchor.month) // self.step
+        # The estimate is at most one step short
+        while self.nth(anchor, n).date() <= day:
+            n += 1
+        return n
+
+    def between(self, anchor: datetime, after: date, through: date) -> Iterator[Tuple[int, datetime]]:
+        """``(n, deadline)`` for each occurrence dated after ``after`` and up to ``through``."""
+        # Dates are taken in UTC whatever session time zone the anchor was read in
+        anchor = anchor.astimezone(timezone.utc)
+        if self.until is not None:
+            through = min(through, self.until)
+        n = self._first_index_after(anchor, after)
+        while self.count is None or n < self.count:
+            deadline = self.nth(anchor, n)
+            if deadline.date() > through:
+                return
+            yield n, deadline
+            n += 1
+
+
+@lru_cache(maxsize=256)
+def compile_rule(rule: str) -> Schedule:
+    """
+    Parse a recurrence rule.
+
+    Raises:
+        ValueError: If the rule is not one this module understands
+    """
+    normalized = rule.strip().upper()
+    if normalized.startswith("RRULE:"):
+        normalized = normalized[len("RRULE:"):]
+    normalized = _SHORTHANDS.get(normalized, normalized)
+
+    parts: Dict[str, str] = {}
+    for part in filter(None, normalized.split(";")):
+        key, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed recurrence rule part: {part!r}")
+        parts[key] = value
+
+    frequency = parts.pop("FREQ", None)
+    if frequency not in _FREQUENCIES:
+        raise ValueError(f"Unsupported recurrence frequency: {frequency!r}")
+    unit, step = _FREQUENCIES[frequency]
+    try:
+        interval = int(parts.pop("INTERVAL", "1"))
+        count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+        until = datetime.strptime(parts.pop("UNTIL")[:8], "%Y%m%d").date() if "UNTIL" in parts else None
+    except ValueError:
+        raise ValueError(f"Invalid value in recurrence rule: {rule!r}")
+    if parts:
+        raise ValueError(f"Unsupported recurrence rule parts: {', '.join(sorted(parts))}")
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError("INTERVAL and COUNT must be positive")
+    return Schedule(unit=unit, step=step * interval, count=count, until=until)
+
+
+def validate_rule(rule: Optional[str]) -> None:
+    """Raise ValueError for a rule ``compile_rule`` would reject; None is valid."""
+    if rule is not None:
+        compile_rule(rule)
+
+
+def project_occurrences(
+    rule: str,
+    anchor: datetime,
+    start: date,
+    end: date,
+    limit: Optional[int] = None
+) -> List[Tuple[int, datetime]]:
+    """
+    ``(n, deadline)`` of the occurrences dated in ``[start, end)``, including
+    occurrence 0, computed without touching the database.
+
+    Raises:
+        ValueError: If the rule does not parse
+    """
+    occurrences = compile_rule(rule).between(anchor, start - timedelta(days=1), end - timedelta(days=1))
+    return list(itertools.islice(occurrences, limit))
+
+
+def _series_query(series_ids: Optional[Iterable[uuid.UUID]]):
+    occurrence = aliased(ComplianceTask)
+    query = (
+        select(
+            ComplianceTask.compliance_task_id,
+            ComplianceTask.recurrence,
+            ComplianceTask.deadline,
+            *(getattr(ComplianceTask, column) for column in _COPIED_COLUMNS),
+            func.max(occurrence.occurrence_date).label("last_materialized")
+        )
+        .outerjoin(occurrence, occurrence.series_id == ComplianceTask.compliance_task_id)
+        .where(ComplianceTask.recurrence.is_not(None), ComplianceTask.series_id.is_(None))
+        .group_by(ComplianceTask.compliance_task_id)
+    )
+    if series_ids is not None:
+        query = query.where(ComplianceTask.compliance_task_id.in_(list(series_ids)))
+    return query
+
+
+def _occurrence_rows(series, today: date, through: date, resume: bool = True) -> Iterator[Dict[str, Any]]:
+    try:
+        schedule = compile_rule(series.recurrence)
+    except ValueError as e:
+        # Rules stored before validation existed are left alone
+        logger.warning("Skipping task series %s: %s", series.compliance_task_id, e)
+        return
+    anchor = series.deadline.astimezone(timezone.utc)
+    # The window opens today: a template with a past deadline (or a rule
+    # stored long before materialization existed) must not backfill the
+    # occurrences it missed, which the overdue sweeper would then flag
+    after = max(anchor.date(), today - timedelta(days=1))
+    if resume and series.last_materialized:
+        after = max(after, series.last_materialized)
+    for _, deadline in schedule.between(anchor, after, through):
+        row = {column: getattr(series, column) for column in _COPIED_COLUMNS}
+        row.update(
+            compliance_task_id=uuid.uuid4(),
+            series_id=series.compliance_task_id,
+            occurrence_date=deadline.date(),
+            deadline=deadline,
+            state=TaskState.OPEN.value,
+        )
+        yield row
+
+
+def _insert_batch(conn: Connection, rows: List[Dict[str, Any]]) -> int:
+    return conn.execute(
+        pg_insert(ComplianceTask.__table__)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["series_id", "occurrence_date"])
+    ).rowcount
+
+
+def materialize(
+    conn: Connection,
+    now: Optional[datetime] = None,
+    horizon_days: int = TASK_RECURRENCE_HORIZON_DAYS,
+    series_ids: Optional[Iterable[uuid.UUID]] = None,
+    batch_size: int = TASK_RECURRENCE_BATCH_SIZE,
+    resume: bool = True
+) -> int:
+    """
+    Insert every occurrence dated from today to the end of the horizon
+    that is not stored yet.
+
+    Each series resumes after its latest stored occurrence. Dates before
+    today are never backfilled. The caller owns the transaction.
+
+    Args:
+        conn: Connection (or ``Session.connection()``) to run on
+        now: Start of the horizon
+        horizon_days: How far past ``now`` occurrences are stored
+        series_ids: Only materialize these templates; all of them if None
+        batch_size: Rows per multi-row INSERT
+        resume: False to start every series from today again, for a series
+            whose rule or anchor changed: its latest stored occurrence may
+            follow the old rule. Dates already stored are skipped by the
+            ON CONFLICT.
+
+    Returns:
+        Number of occurrences inserted
+    """
+    now = now or datetime.now(timezone.utc)
+    through = (now + timedelta(days=horizon_days)).date()
+    inserted = 0
+    batch: List[Dict[str, Any]] = []
+    for series in conn.execute(_series_query(series_ids)):
+        for row in _occurrence_rows(series, now.date(), through, resume):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                inserted += _insert_batch(conn, batch)
+                batch = []
+    if batch:
+        inserted += _insert_batch(conn, batch)
+    return inserted
+
+
+def discard_pending(conn: Connection, series_id: uuid.UUID, now: Optional[datetime] = None) -> int:
+    """
+    Delete a series' stored occurrences that have not started yet.
+
+    Used when a template's rule or deadline changes, before rematerializing
+    it. Occurrences still Open with a future deadline are the ones dropped.
+    Occurrences another task depends on are kept.
+    """
+    now = now or datetime.now(timezone.utc)
+    dependent = aliased(ComplianceTask)
+    return conn.execute(
+        delete(ComplianceTask).where(
+            ComplianceTask.series_id == series_id,
+            ComplianceTask.state == TaskState.OPEN.value,
+            ComplianceTask.deadline > now,
+            ~exists().where(dependent.dependent_task_id == ComplianceTask.compliance_task_id)
+        )
+    ).rowcount
+
+
+def rematerialize(conn: Connection, series_id: uuid.UUID, now: Optional[datetime] = None) -> int:
+    """
+    Rebuild a series' stored occurrences after its rule or anchor changed.
+
+    Occurrences that have not started are dropped (``discard_pending``).
+    The new schedule is then materialized from today, not from the latest
+    kept occurrence. A kept occurrence may lie well after dates the new
+    rule still needs.
+
+    Returns:
+        Number of occurrences inserted
+    """
+    now = now or datetime.now(timezone.utc)
+    discard_pending(conn, series_id, now)
+    return materialize(conn, now, series_ids=[series_id], resume=False)
+
+
+class MaterializerStats:
+    """Counters for the materializer runs in this process, published on /api/metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_run: Optional[datetime] = None
+        self.last_inserted = 0
+        self.total_inserted = 0
+
+    def record(self, inserted: int, at: datetime) -> None:
+        with self._lock:
+            self.runs += 1
+            self.last_run = at
+            self.last_inserted = inserted
+            self.total_inserted += inserted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "last_run": self.last_run.isoformat() if self.last_run else None,
+                "last_inserted": self.last_inserted,
+                "total_inserted": self.total_inserted,
+                "compiled_rules": compile_rule.cache_info()._asdict(),
+            }
+
+
+materializer_stats = MaterializerStats()
+
+
+def run_materializer(engine: Engine, now: Optional[datetime] = None) -> int:
+    """Materialize every series in one transaction and record the run."""
+    now = now or datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        inserted = materialize(conn, now)
+        if inserted:
+            logger.info("Materialized %d recurring task occurrences", inserted)
+            conn.execute(insert(AuditLog.__table__).values(
+                log_id=uuid.uuid4(),
+                user_id=None,
+                activity="recurring_tasks_materialized",
+                timestamp=datetime.now(timezone.utc),
+                details=json.dumps({"inserted": inserted, "horizon_days": TASK_RECURRENCE_HORIZON_DAYS})
+            ))
+    materializer_stats.record(inserted, now)
+    return inserted
+
+
+async def materialize_loop(engine: Engine, interval: float = TASK_RECURRENCE_INTERVAL_SECONDS) -> None:
+    """Run ``run_materializer`` now and then every ``interval`` seconds, off the event loop."""
+    while True:
+        try:
+            await asyncio.to_thread(run_materializer, engine)
+        except Exception:
+            logger.exception("Recurring task materialization failed")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    from app.database.base import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(run_materializer(engine))
+
@@ -0,0 +1,139 @@
+"""
+Time-bucketed created / completed / overdue counts for compliance tasks.
+
+Every bucket in the requested range comes from one pass over
+compliance_tasks: each task contributes up to three events (created,
+completed, overdue) through a LATERAL VALUES list, and a single
+``date_trunc`` GROUP BY counts them per bucket and category.
+
+Tasks have no completion timestamp, so a completed task is counted in
+the bucket of its ``updated_at``. A task is overdue in the bucket of its
+deadline once the deadline has passed without it being completed by
+then. Buckets that have closed are cached; only the bucket containing
+"now" (and any closed bucket not yet cached) is recomputed.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import os
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.compliance_task import TaskState
+from app.utils.audit_partitions import add_months, month_start
+from app.utils.cache import TTLCache
+
+WEEK = "week"
+MONTH = "month"
+
+# Closed buckets only change if a completed task is edited afterwards,
+# so they can be kept for a long time
+TASK_TREND_CACHE_SIZE = int(os.getenv("TASK_TREND_CACHE_SIZE", "2048"))
+TASK_TREND_CACHE_TTL_SECONDS = int(os.getenv("TASK_TREND_CACHE_TTL_SECONDS", "3600"))
+
+task_trend_cache = TTLCache(maxsize=TASK_TREND_CACHE_SIZE, ttl=TASK_TREND_CACHE_TTL_SECONDS)
+
+EVENT_KINDS = ("created", "completed", "overdue")
+
+_TREND_SQL = text("""
+    SELECT date_trunc(:unit, e.at AT TIME ZONE 'UTC') AS bucket, t.category, e.kind, count(*)
+    FROM compliance_tasks t
+    CROSS JOIN LATERAL (VALUES
+        ('created', t.created_at),
+        ('completed', CASE WHEN t.state = :completed THEN t.updated_at END),
+        ('overdue', CASE
+            WHEN t.deadline < :now AND (t.state <> :completed OR t.updated_at > t.deadline)
+            THEN t.deadline
+        END)
+    ) AS e(kind, at)
+    WHERE e.at >= :start AND e.at < :end
+    GROUP BY 1, 2, 3
+""")
+
+# bucket start -> category -> {"created": n, "completed": n, "overdue": n}
+BucketCounts = Dict[str, Dict[str, int]]
+
+
+def bucket_start(day: date, period: str) -> date:
+    """First day of the bucket containing ``day`` (weeks start on Monday, as in Postgres)."""
+    if period == WEEK:
+        return day - timedelta(days=day.weekday())
+    return month_start(day)
+
+
+def next_bucket(start: date, period: str) -> date:
+    return start + timedelta(days=7) if period == WEEK else add_months(start, 1)
+
+
+def bucket_starts(start: date, end: date, period: str) -> List[date]:
+    """Starts of every bucket overlapping ``[start, end)``."""
+    starts = []
+    current = bucket_start(start, period)
+    while current < end:
+        starts.append(current)
+        current = next_bucket(current, period)
+    return starts
+
+
+def _utc(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+async def _count_events(db: AsyncSession, period: str, start: date, end: date, now: datetime) -> Dict[date, BucketCounts]:
+    rows = await db.execute(_TREND_SQL, {
+        "unit": period,
+        "completed": TaskState.COMPLETED.value,
+        "now": now,
+        "start": _utc(start),
+        "end": _utc(end),
+    })
+    counts: Dict[date, BucketCounts] = {}
+    for bucket, category, kind, count in rows:
+        per_category = counts.setdefault(bucket.date(), {})
+        per_category.setdefault(category, dict.fromkeys(EVENT_KINDS, 0))[kind] = count
+    return counts
+
+
+async def task_trend(
+    db: AsyncSession,
+    period: str,
+    start: date,
+    end: date,
+    now: Optional[datetime] = None
+) -> Dict[date, BucketCounts]:
+    """
+    Count created, completed and overdue tasks per bucket and category.
+
+    Args:
+        db: Database session
+        period: ``"week"`` or ``"month"``
+        start: First day of the range; widened to the start of its bucket
+        end: Day after the range
+        now: Reference time for overdue checks and for deciding which buckets are closed
+
+    Returns:
+        Counts keyed by bucket start, for every bucket in the range (empty buckets included)
+    """
+    now = now or datetime.now(timezone.utc)
+    starts = bucket_starts(start, end, period)
+    if not starts:
+        return {}
+    current = bucket_start(now.date(), period)
+
+    result: Dict[date, BucketCounts] = {}
+    missing = []
+    for bucket in starts:
+        cached = task_trend_cache.get((period, bucket)) if bucket < current else None
+        if cached is None:
+            missing.append(bucket)
+        else:
+            result[bucket] = cached
+
+    if missing:
+        # One pass from the first bucket we still need to the end of the range
+        counts = await _count_events(db, period, missing[0], next_bucket(starts[-1], period), now)
+        for bucket in missing:
+            result[bucket] = counts.get(bucket, {})
+            if bucket < current:
+                task_trend_cache.set((period, bucket), result[bucket])
+    return dict(sorted(result.items()))
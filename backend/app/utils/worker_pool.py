@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import threading
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a BoundedWorkerPool already holds its maximum number of jobs."""
+
+
+class BoundedWorkerPool:
+    """
+    A thread pool for CPU-bound work that must not run on the event loop.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    may wait for a worker; anything beyond that is rejected immediately with
+    PoolSaturatedError instead of piling up behind the running jobs.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "worker"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` on a worker thread and await its result.
+
+        Raises:
+            PoolSaturatedError: If the running and queued jobs are at capacity
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturatedError(f"{self.max_workers + self.max_queue} jobs already in flight")
+            self._in_flight += 1
+
+        # The slot is released when the job finishes, not when the awaiting
+        # request goes away, so cancelled requests cannot overfill the queue.
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
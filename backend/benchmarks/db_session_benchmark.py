@@ -0,0 +1,109 @@
+"""
+Sync vs async session throughput benchmark.
+
+Runs the same read query from many concurrent coroutines, first through the
+synchronous SessionLocal (what the hot read routes used to do inside
+``async def``) and then through AsyncSessionLocal. A ticker coroutine runs
+alongside and records event-loop lag: with the sync session every query
+stalls the loop, so lag tracks query latency and throughput stays flat as
+concurrency grows.
+
+Usage (from backend/, against a migrated database):
+    python benchmarks/db_session_benchmark.py --requests 2000 --concurrency 50
+    python benchmarks/db_session_benchmark.py --slow-ms 20   # add pg_sleep per query
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+from sqlalchemy import select, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database.base import SessionLocal, AsyncSessionLocal, async_engine  # noqa: E402
+from app.models.compliance_task import ComplianceTask  # noqa: E402
+from login_benchmark import percentile, spread  # noqa: E402
+
+# Register every mapper that ComplianceTask's relationships can reach
+from app.models import audit_log, compliance_records, document, lp_details, lp_drawdowns, user  # noqa: E402,F401
+
+
+def build_query(args):
+    return select(ComplianceTask).limit(args.limit)
+
+
+def sleep_clause(args):
+    return text("SELECT pg_sleep(:s)").bindparams(s=args.slow_ms / 1000) if args.slow_ms else None
+
+
+async def sync_worker(args, count: int, latencies: List[float]) -> None:
+    query, slow = build_query(args), sleep_clause(args)
+    for _ in range(count):
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            if slow is not None:
+                db.execute(slow)
+            db.execute(query).scalars().all()
+        finally:
+            db.close()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0)
+
+
+async def async_worker(args, count: int, latencies: List[float]) -> None:
+    query, slow = build_query(args), sleep_clause(args)
+    for _ in range(count):
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            if slow is not None:
+                await db.execute(slow)
+            (await db.execute(query)).scalars().all()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def ticker(stop: asyncio.Event, lags: List[float], interval: float = 0.005) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def run(label: str, worker, args) -> None:
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop, lags))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(args, n, latencies) for n in spread(args.requests, args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick
+    print(
+        f"{label:<6} n={len(latencies):<6} "
+        f"p50={percentile(latencies, 50):8.1f}ms "
+        f"p99={percentile(latencies, 99):8.1f}ms "
+        f"rps={len(latencies) / elapsed if elapsed else 0:8.1f} "
+        f"loop_lag_p99={percentile(lags, 99):8.1f}ms"
+    )
+
+
+async def main(args) -> None:
+    print(f"requests={args.requests} concurrency={args.concurrency} slow_ms={args.slow_ms}")
+    await run("sync", sync_worker, args)
+    await run("async", async_worker, args)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100, help="Rows fetched per query")
+    parser.add_argument("--slow-ms", type=float, default=0, help="Extra pg_sleep per query to mimic a slow query")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Login throughput benchmark.
+
+Fires concurrent logins at /api/auth/login while unrelated GET traffic hits
+the same server, then reports p50/p99 latency for each kind of request.
+A blocked event loop shows up as GET latency tracking bcrypt latency.
+
+Usage (against a running server):
+    python benchmarks/login_benchmark.py --base-url http://localhost:8000 \\
+        --logins 200 --login-concurrency 20 --gets 2000 --get-concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+BENCH_USER = {
+    "name": "Benchmark User",
+    "email": "bench@example.com",
+    "role": "Fund Manager",
+    "password": "benchpassword",
+    "mfa_enabled": False
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def worker(client, method, path, count, latencies, errors, **kwargs):
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+        except httpx.HTTPError as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def spread(total: int, workers: int) -> List[int]:
+    workers = max(1, min(workers, total)) if total else 0
+    return [total // workers + (1 if i < total % workers else 0) for i in range(workers)]
+
+
+def report(label: str, latencies: List[float], errors: dict, elapsed: float) -> None:
+    print(
+        f"{label:<8} n={len(latencies):<6} "
+        f"p50={percentile(latencies, 50):8.1f}ms "
+        f"p99={percentile(latencies, 99):8.1f}ms "
+        f"mean={statistics.mean(latencies) if latencies else 0:8.1f}ms "
+        f"rps={len(latencies) / elapsed if elapsed else 0:8.1f} "
+        f"errors={errors or 0}"
+    )
+
+
+async def main(args) -> None:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        await client.post("/users/", json=BENCH_USER)
+
+        login_latencies, get_latencies = [], []
+        login_errors, get_errors = {}, {}
+        login_form = {"username": BENCH_USER["email"], "password": BENCH_USER["password"]}
+
+        tasks = [
+            worker(client, "POST", "/api/auth/login", n, login_latencies, login_errors, data=login_form)
+            for n in spread(args.logins, args.login_concurrency)
+        ] + [
+            worker(client, "GET", args.get_path, n, get_latencies, get_errors)
+            for n in spread(args.gets, args.get_concurrency)
+        ]
+
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.base_url}  elapsed={elapsed:.2f}s")
+    report("login", login_latencies, login_errors, elapsed)
+    report("get", get_latencies, get_errors, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=20)
+    parser.add_argument("--gets", type=int, default=2000)
+    parser.add_argument("--get-concurrency", type=int, default=50)
+    parser.add_argument("--get-path", default="/", help="Unrelated GET endpoint to mix in")
+    asyncio.run(main(parser.parse_args()))
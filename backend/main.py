@@ -1,31 +1,67 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Form
+from fastapi import FastAPI, Depends, HTTPException, Query, status, Form
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.base import get_db
+from app.database.base import get_db, engine, async_engine
+from app.database.replicas import get_read_db
+from app.database.instrumentation import add_query_instrumentation
 from app.models.user import User
 from app.models.compliance_task import ComplianceTask, TaskState, TaskCategory
-from app.auth.security import get_password_hash, verify_password, create_access_token, get_current_user, check_role
-from app.schemas.compliance_task import ComplianceTaskCreate, ComplianceTaskUpdate, ComplianceTaskResponse
+from app.auth.security import get_password_hash_async, verify_password_async, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.auth.identity import get_current_user_id
+from app.auth.permissions import Permission, require_permission, permissions_for_role
+from app.auth.refresh_tokens import issue_refresh_token, get_refresh_token_user, revoke_refresh_token
+from app.auth.login_throttle import check_login_rate_limit, record_failed_login
+from app.schemas.compliance_task import ComplianceTaskCreate, ComplianceTaskUpdate, ComplianceTaskResponse, TaskDependencyStatus, TaskOccurrence
 from app.api.documents import router as documents_router
 from app.api.reports import router as reports_router
 from app.api.lp import router as lp_router
 from app.api.compliance import router as compliance_router
-from app.utils.audit import log_activity
+from app.api.metrics import router as metrics_router
+from app.api.audit_logs import router as audit_logs_router
+from app.utils.audit import stage_activity, log_activity, audit_buffer
+from app.utils.audit_partitions import maintenance_loop
+from app.utils.overdue_sweeper import sweep_loop
+from app.utils.task_recurrence import (
+    MAX_PROJECTED_OCCURRENCES, validate_rule, materialize, rematerialize, materialize_loop, project_occurrences
+)
+from app.utils.task_dependencies import (
+    check_dependency, frontier_query, collect_frontier, dependent_task_ids, filter_ready
+)
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 import uuid
-from datetime import timedelta, datetime
+from datetime import date, timedelta, datetime, timezone
 from sqlalchemy.exc import IntegrityError
 import traceback
+import asyncio
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 import os
 
 app = FastAPI()
+add_query_instrumentation(app)
 
 # Mount the routers
 app.include_router(documents_router, prefix="/api/documents", tags=["documents"])
 app.include_router(reports_router, prefix="/api/reports", tags=["reports"])
 app.include_router(lp_router, prefix="/api/lps", tags=["lps"])
 app.include_router(compliance_router, prefix="/api/compliance", tags=["compliance"])
+app.include_router(metrics_router, prefix="/api/metrics", tags=["metrics"])
+app.include_router(audit_logs_router, prefix="/api/audit-logs", tags=["audit-logs"])
+
+@app.on_event("startup")
+async def start_audit_buffer():
+    audit_buffer.start(async_engine)
+    app.state.audit_maintenance = asyncio.create_task(maintenance_loop(engine))
+    app.state.overdue_sweeper = asyncio.create_task(sweep_loop(engine))
+    app.state.task_recurrence = asyncio.create_task(materialize_loop(engine))
+
+@app.on_event("shutdown")
+async def flush_audit_buffer():
+    app.state.audit_maintenance.cancel()
+    app.state.overdue_sweeper.cancel()
+    app.state.task_recurrence.cancel()
+    await audit_buffer.stop()
 
 # Create uploads directory if it doesn't exist
 os.makedirs("uploads", exist_ok=True)
@@ -54,6 +90,16 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+def issue_access_token(user: User) -> str:
+    return create_access_token(
+        data={"sub": user.email, "role": user.role, "perms": permissions_for_role(user.role)}, 
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
 
 @app.get("/")
 async def read_root():
@@ -71,7 +117,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
             )
 
         # Hash the password before storing
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         
         # Validate role
         valid_roles = ["Fund Manager", "Compliance Officer", "LP"]
@@ -111,34 +157,63 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
 @app.post("/api/auth/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    _: None = Depends(check_login_rate_limit),
+    db: Session = Depends(get_db)
+):
     user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
+        record_failed_login(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Log successful login
+    refresh_token = issue_refresh_token(db, user.user_id)
+    db.commit()
+    # A login changes no audited data, so its entry goes through the audit
+    # buffer instead of adding a write to every login
     log_activity(db, "login", user.user_id, f"User {user.email} logged in")
     
-    access_token_expires = timedelta(minutes=30)
-    access_token = create_access_token(
-        data={"sub": user.email, "role": user.role}, 
-        expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {
+        "access_token": issue_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": refresh_token
+    }
+
+@app.post("/api/auth/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token without re-checking the password.
+    """
+    _, user = get_refresh_token_user(db, request.refresh_token)
+    return {
+        "access_token": issue_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": request.refresh_token
+    }
+
+@app.post("/api/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Revoke a refresh token so it can no longer be exchanged.
+    """
+    revoked = revoke_refresh_token(db, request.refresh_token)
+    if revoked is not None:
+        db.commit()
+    return None
 
 @app.get("/api/users/me", response_model=UserResponse)
-async def read_users_me(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == current_user["sub"]).first()
+async def read_users_me(user_id: Optional[uuid.UUID] = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    user = db.get(User, user_id) if user_id else None
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @app.get("/api/fund-manager/dashboard")
-async def fund_manager_dashboard(current_user: dict = Depends(check_role("Fund Manager"))):
+async def fund_manager_dashboard(current_user: dict = Depends(require_permission(Permission.FUND_MANAGER_DASHBOARD))):
     return {
         "message": "Welcome to Fund Manager Dashboard",
         "user": current_user["sub"]
@@ -149,7 +224,7 @@ async def fund_manager_dashboard(current_user: dict = Depends(check_role("Fund M
 @app.post("/api/tasks/", response_model=ComplianceTaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: ComplianceTaskCreate,
-    current_user: dict = Depends(get_current_user),
+    user_id: Optional[uuid.UUID] = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     try:
@@ -158,32 +233,29 @@ async def create_task(
         if not assignee:
             raise HTTPException(status_code=404, detail="Assignee not found")
 
-        # Validate dependent task if specified
+        try:
+            validate_rule(task.recurrence)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        task_id = uuid.uuid4()
         if task.dependent_task_id:
-            dependent_task = db.query(ComplianceTask).filter(
-                ComplianceTask.compliance_task_id == task.dependent_task_id
-            ).first()
-            if not dependent_task:
-                raise HTTPException(status_code=404, detail="Dependent task not found")
+            check_dependency(db, task_id, task.dependent_task_id)
 
-        db_task = ComplianceTask(**task.model_dump())
+        db_task = ComplianceTask(compliance_task_id=task_id, **task.model_dump())
         db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
-        
-        # Log task creation
-        user_id = None
-        if "sub" in current_user:
-            user = db.query(User).filter(User.email == current_user["sub"]).first()
-            if user:
-                user_id = user.user_id
-                
-        log_activity(
+        if task.recurrence:
+            # The first occurrences land with the task rather than on the next materializer run
+            db.flush()
+            materialize(db.connection(), series_ids=[task_id])
+        stage_activity(
             db, 
             "task_created", 
             user_id, 
             f"Task created: {db_task.compliance_task_id} - {task.description}"
         )
+        db.commit()
+        db.refresh(db_task)
         
         return db_task
 
@@ -198,19 +270,121 @@ async def get_tasks(
     state: Optional[TaskState] = None,
     category: Optional[TaskCategory] = None,
     assignee_id: Optional[uuid.UUID] = None,
+    ready: Optional[bool] = Query(None, description="true: open tasks with nothing blocking them; false: blocked tasks"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(ComplianceTask)
+    query = filter_ready(select(ComplianceTask), ready)
     
     if state:
-        query = query.filter(ComplianceTask.state == state)
+        query = query.where(ComplianceTask.state == state)
     if category:
-        query = query.filter(ComplianceTask.category == category)
+        query = query.where(ComplianceTask.category == category)
     if assignee_id:
-        query = query.filter(ComplianceTask.assignee_id == assignee_id)
+        query = query.where(ComplianceTask.assignee_id == assignee_id)
+
+    result = await db.execute(query)
+    return result.scalars().all()
 
-    return query.all()
+@app.get("/api/tasks/dependencies", response_model=List[TaskDependencyStatus])
+async def get_task_dependencies(
+    task_ids: List[uuid.UUID] = Query(..., alias="task_id"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Report, for each requested task, whether it is ready or which tasks in its chain still block it.
+    """
+    frontier = collect_frontier(await db.execute(frontier_query(task_ids)))
+    missing = [str(task_id) for task_id in task_ids if task_id not in frontier]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Tasks not found: {', '.join(missing)}")
+    return [
+        TaskDependencyStatus(compliance_task_id=task_id, ready=not frontier[task_id], blocked_by=frontier[task_id])
+        for task_id in dict.fromkeys(task_ids)
+    ]
+
+@app.get("/api/tasks/{task_id}/blocking", response_model=List[ComplianceTaskResponse])
+async def get_tasks_blocked_by(
+    task_id: uuid.UUID,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    List the incomplete tasks that depend on this one, directly or further down a chain.
+    """
+    result = await db.execute(
+        select(ComplianceTask).where(
+            ComplianceTask.compliance_task_id.in_(dependent_task_ids(task_id)),
+            ComplianceTask.state != TaskState.COMPLETED.value
+        )
+    )
+    return result.scalars().all()
+
+@app.get("/api/tasks/{task_id}/occurrences", response_model=List[TaskOccurrence])
+async def get_task_occurrences(
+    task_id: uuid.UUID,
+    start: Optional[date] = Query(None, description="First day of the range; defaults to today"),
+    end: Optional[date] = Query(None, description="Day after the range; defaults to a year after start"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    List a recurring task's occurrences in a date range.
+
+    Occurrences within the materialization horizon are the stored task rows.
+    Later ones are computed from the rule on the fly and are not stored.
+    """
+    template = (await db.execute(
+        select(ComplianceTask).where(ComplianceTask.compliance_task_id == task_id)
+    )).scalar_one_or_none()
+    if not template:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not template.recurrence:
+        raise HTTPException(status_code=400, detail="Task is not recurring")
+
+    start = start or datetime.now(timezone.utc).date()
+    end = end or start + timedelta(days=365)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    try:
+        projected = project_occurrences(template.recurrence, template.deadline, start, end, MAX_PROJECTED_OCCURRENCES + 1)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(projected) > MAX_PROJECTED_OCCURRENCES:
+        raise HTTPException(status_code=400, detail=f"Range spans more than {MAX_PROJECTED_OCCURRENCES} occurrences")
+
+    stored = {
+        task.occurrence_date: task
+        for task in (await db.execute(
+            select(ComplianceTask).where(
+                ComplianceTask.series_id == task_id,
+                ComplianceTask.occurrence_date >= start,
+                ComplianceTask.occurrence_date < end
+            )
+        )).scalars()
+    }
+    occurrences = []
+    for n, deadline in projected:
+        task = template if n == 0 else stored.pop(deadline.date(), None)
+        if task is None:
+            occurrences.append(TaskOccurrence(
+                occurrence_date=deadline.date(), deadline=deadline, state=TaskState.OPEN, materialized=False
+            ))
+        else:
+            occurrences.append(TaskOccurrence(
+                occurrence_date=deadline.date(), deadline=task.deadline, state=task.state,
+                materialized=True, compliance_task_id=task.compliance_task_id
+            ))
+    # Occurrences kept from before the rule last changed
+    occurrences.extend(
+        TaskOccurrence(
+            occurrence_date=day, deadline=task.deadline, state=task.state,
+            materialized=True, compliance_task_id=task.compliance_task_id
+        )
+        for day, task in stored.items()
+    )
+    return sorted(occurrences, key=lambda occurrence: occurrence.occurrence_date)
 
 @app.patch("/api/tasks/{task_id}", response_model=ComplianceTaskResponse)
 async def update_task(
@@ -223,22 +397,39 @@ async def update_task(
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    # Check if trying to complete a task with incomplete dependency
-    if (task_update.state == TaskState.COMPLETED and db_task.dependent_task_id):
-        dependent_task = db.query(ComplianceTask).filter(
-            ComplianceTask.compliance_task_id == db_task.dependent_task_id
-        ).first()
-        if dependent_task and dependent_task.state != TaskState.COMPLETED:
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot complete task: dependent task is not completed"
-            )
+    if task_update.dependent_task_id and task_update.dependent_task_id != db_task.dependent_task_id:
+        check_dependency(db, task_id, task_update.dependent_task_id)
+
+    if task_update.recurrence:
+        if db_task.series_id:
+            raise HTTPException(status_code=400, detail="An occurrence of a recurring task cannot recur itself")
+        try:
+            validate_rule(task_update.recurrence)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    was_recurring = bool(db_task.recurrence)
 
     # Update task fields
     update_data = task_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_task, field, value)
 
+    # A task can only be completed once its whole dependency chain is.
+    # Flushed first so a dependency changed by this same patch is the one checked.
+    if task_update.state == TaskState.COMPLETED and db_task.dependent_task_id:
+        db.flush()
+        if collect_frontier(db.execute(frontier_query([task_id]))).get(task_id):
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="Cannot complete task: dependent task is not completed"
+            )
+
+    # A new rule or anchor replaces the occurrences that have not started yet
+    if (was_recurring or db_task.recurrence) and update_data.keys() & {"recurrence", "deadline"}:
+        db.flush()
+        rematerialize(db.connection(), task_id)
+
     try:
         db.commit()
         db.refresh(db_task)
@@ -0,0 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager
+import app.utils.audit as audit
+from app.utils.audit import AuditBuffer, log_activity, stage_activity
+
+class FakeAsyncEngine:
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+
+    @asynccontextmanager
+    async def begin(self):
+        engine = self
+
+        class Conn:
+            async def execute(self, statement, rows):
+                if engine.fail_times:
+                    engine.fail_times -= 1
+                    raise RuntimeError("database unavailable")
+                engine.batches.append(list(rows))
+        yield Conn()
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+        self.commits = 0
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        self.commits += 1
+
+    def refresh(self, obj):
+        pass
+
+def test_full_batch_is_flushed_without_waiting_for_interval():
+    async def scenario():
+        buffer = AuditBuffer(batch_size=3, flush_interval=60, max_buffer=100)
+        engine = FakeAsyncEngine()
+        buffer.start(engine)
+        for i in range(3):
+            buffer.add({"activity": f"event{i}"})
+        await asyncio.sleep(0.05)
+        assert [len(batch) for batch in engine.batches] == [3]
+
+        buffer.add({"activity": "tail"})
+        await buffer.stop()
+        assert [len(batch) for batch in engine.batches] == [3, 1]
+        assert buffer.stats()["flushed"] == 4
+
+    asyncio.run(scenario())
+
+def test_failed_flush_is_requeued():
+    async def scenario():
+        buffer = AuditBuffer(batch_size=10, flush_interval=60, max_buffer=100)
+        engine = FakeAsyncEngine(fail_times=1)
+        buffer.start(engine)
+        buffer.add({"activity": "event"})
+        assert await buffer.flush() is False
+        assert buffer.stats()["pending"] == 1
+        await buffer.stop()
+        assert engine.batches == [[{"activity": "event"}]]
+
+    asyncio.run(scenario())
+
+def test_buffer_drops_oldest_beyond_capacity():
+    buffer = AuditBuffer(batch_size=10, flush_interval=60, max_buffer=2)
+    for i in range(3):
+        buffer.add({"activity": f"event{i}"})
+    assert buffer.stats()["dropped"] == 1
+    assert [e["activity"] for e in buffer._take()] == ["event1", "event2"]
+
+def test_log_activity_buffers_unless_durable(monkeypatch):
+    async def scenario():
+        buffer = AuditBuffer(batch_size=10, flush_interval=60, max_buffer=100)
+        monkeypatch.setattr(audit, "audit_buffer", buffer)
+        buffer.start(FakeAsyncEngine())
+        db = FakeSession()
+
+        entry = log_activity(db, "login", details="buffered")
+        assert db.commits == 0
+        assert buffer.stats()["pending"] == 1
+        assert entry.log_id is not None and entry.timestamp is not None
+
+        log_activity(db, "lp_deleted", details="durable", durable=True)
+        assert db.commits == 1
+        await buffer.stop()
+
+    asyncio.run(scenario())
+
+def test_log_activity_is_synchronous_when_buffer_is_inactive():
+    db = FakeSession()
+    log_activity(db, "login")
+    assert db.commits == 1
+
+def test_stage_activity_leaves_commit_to_the_caller():
+    db = FakeSession()
+    entry = stage_activity(db, "lp_created", details="staged")
+    assert db.added == [entry]
+    assert db.commits == 0
+    assert entry.log_id is not None and entry.timestamp is not None
@@ -0,0 +1,94 @@
+from sqlalchemy.dialects import postgresql
+from types import SimpleNamespace
+from app.models.compliance_records import ComplianceRecord
+from app.utils.compliance_stats import (
+    build_stats, compliance_stats_cache, move_count,
+    _note_record_changes, _invalidate_stats, _forget_record_changes
+)
+
+COUNTS = [
+    ("LP", "KYC", "Compliant", 3),
+    ("LP", "KYC", "Pending Review", 1),
+    ("LP", "AML", "Non-Compliant", 2),
+    ("Fund", "KYC", "Exempted", 2),
+]
+
+def test_totals_come_from_one_set_of_grouped_counts():
+    stats = build_stats(COUNTS)
+    assert stats == {
+        "total": 8,
+        "compliant": 3,
+        "non_compliant": 2,
+        "pending_review": 1,
+        "exempted": 2,
+        "compliance_rate": 37.5,
+    }
+
+def test_breakdown_by_entity_and_compliance_type():
+    by_entity = build_stats(COUNTS, ["entity_type"])["breakdown"]
+    assert [(b["entity_type"], b["total"]) for b in by_entity] == [("Fund", 2), ("LP", 6)]
+
+    by_both = build_stats(COUNTS, ["entity_type", "compliance_type"])["breakdown"]
+    lp_kyc = next(b for b in by_both if b["entity_type"] == "LP" and b["compliance_type"] == "KYC")
+    assert lp_kyc["total"] == 4 and lp_kyc["compliance_rate"] == 75.0
+
+def test_empty_table_has_zero_rate():
+    assert build_stats([])["compliance_rate"] == 0
+
+class FakeSession:
+    def __init__(self, *new):
+        self.new, self.dirty, self.deleted = list(new), [], []
+        self.info = {}
+        self.nested = False
+
+    def in_nested_transaction(self):
+        return self.nested
+
+def test_record_changes_drop_cached_counts_only_on_commit():
+    db = FakeSession(ComplianceRecord(entity_type="LP", compliance_type="KYC"))
+    compliance_stats_cache.set(None, COUNTS)
+    _note_record_changes(db, None)
+    # Flushed but not committed: other readers still see the old counts
+    assert compliance_stats_cache.get(None) == COUNTS
+
+    db.nested = True
+    _invalidate_stats(db)
+    assert compliance_stats_cache.get(None) == COUNTS
+
+    db.nested = False
+    _invalidate_stats(db)
+    assert compliance_stats_cache.get(None) is None
+
+def test_rolled_back_or_unrelated_changes_keep_cached_counts():
+    compliance_stats_cache.set(None, COUNTS)
+    db = FakeSession(object())
+    _note_record_changes(db, None)
+    _invalidate_stats(db)
+    assert compliance_stats_cache.get(None) == COUNTS
+
+    db = FakeSession(ComplianceRecord(entity_type="LP", compliance_type="KYC"))
+    _note_record_changes(db, None)
+    _forget_record_changes(db, SimpleNamespace(nested=False))
+    _invalidate_stats(db)
+    assert compliance_stats_cache.get(None) == COUNTS
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()).params)
+
+def test_status_change_moves_one_record_between_buckets():
+    db = RecordingSession()
+    move_count(db, ("LP", "KYC", "Pending Review"), ("LP", "KYC", "Compliant"))
+    # Touched in key order, whatever the direction of the move
+    assert [(p["compliance_status"], p["record_count"]) for p in db.statements] == [
+        ("Compliant", 1), ("Pending Review", -1)
+    ]
+
+def test_unchanged_bucket_writes_nothing():
+    db = RecordingSession()
+    key = ("Fund", "AML", "Compliant")
+    move_count(db, key, key)
+    assert db.statements == []
@@ -0,0 +1,16 @@
+from app.utils.etags import etag_matches, make_etag
+
+def test_etag_is_weak_and_changes_with_its_parts():
+    etag = make_etag("id", "2026-10-16T12:00:00+00:00")
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == make_etag("id", "2026-10-16T12:00:00+00:00")
+    assert etag != make_etag("id", "2026-10-16T12:00:01+00:00")
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("id", 1)
+    strong = etag[2:]
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {strong}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("id", 2), etag)
@@ -0,0 +1,19 @@
+import uuid
+import pytest
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from app.utils.pagination import encode_cursor, decode_cursor, NEXT, PREV
+
+def test_cursor_round_trip_keeps_microseconds_and_timezone():
+    created_at = datetime(2026, 10, 16, 12, 30, 45, 123456, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+    for direction in (NEXT, PREV):
+        cursor = encode_cursor(created_at, row_id, direction)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (created_at, row_id, direction)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "eyJjIjoxfQ", encode_cursor(datetime.now(), uuid.uuid4(), NEXT)[:-3] + "!!!"])
+def test_malformed_cursor_is_rejected_with_400(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
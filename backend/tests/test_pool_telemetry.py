@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+from app.database.pool import PoolTelemetry, timed_pool_class
+
+@pytest.fixture
+def engine_and_telemetry(tmp_path):
+    telemetry = PoolTelemetry("test")
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=timed_pool_class(QueuePool, telemetry),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1
+    )
+    telemetry.engine = engine
+    yield engine, telemetry
+    engine.dispose()
+
+def test_checkouts_and_occupancy_are_reported(engine_and_telemetry):
+    engine, telemetry = engine_and_telemetry
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        stats = telemetry.stats()
+        assert stats["checkedout"] == 1
+        assert stats["size"] == 1
+
+    stats = telemetry.stats()
+    assert stats["checkouts"] == 1
+    assert stats["checkedout"] == 0
+    assert stats["timeouts"] == 0
+
+def test_exhausted_pool_records_timeout_and_wait(engine_and_telemetry):
+    engine, telemetry = engine_and_telemetry
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = telemetry.stats()
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_ms"] >= 100
+
+def test_telemetry_survives_dispose(engine_and_telemetry):
+    engine, telemetry = engine_and_telemetry
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert telemetry.stats()["checkouts"] == 1
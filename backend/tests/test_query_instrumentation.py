@@ -0,0 +1,49 @@
+import json
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+import app.database.instrumentation as instrumentation
+from app.database.instrumentation import add_query_instrumentation, instrument_engine
+
+@pytest.fixture
+def client(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'timing.db'}")
+    instrument_engine(engine)
+    test_app = FastAPI()
+    add_query_instrumentation(test_app)
+
+    @test_app.get("/items/{n}")
+    async def run_queries(n: int):
+        with engine.connect() as conn:
+            for _ in range(n):
+                conn.execute(text("SELECT 1"))
+        return {"ran": n}
+
+    yield TestClient(test_app)
+    engine.dispose()
+
+def test_server_timing_reports_query_count(client):
+    response = client.get("/items/3")
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert 'desc="3 queries"' in timing
+    assert "db-slowest;dur=" in timing
+
+def test_each_request_is_counted_separately(client):
+    client.get("/items/3")
+    assert 'desc="1 queries"' in client.get("/items/1").headers["Server-Timing"]
+
+def test_query_budget_warning(client, caplog, monkeypatch):
+    monkeypatch.setitem(instrumentation.route_query_budgets, "GET /items/{n}", 2)
+    with caplog.at_level(logging.INFO, logger="app.sql"):
+        client.get("/items/2")
+        assert not [r for r in caplog.records if r.levelno == logging.WARNING]
+        client.get("/items/3")
+
+    warnings = [json.loads(r.getMessage()) for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert warnings[0]["event"] == "query_budget_exceeded"
+    assert warnings[0]["queries"] == 3
+    assert warnings[0]["route"] == "GET /items/{n}"
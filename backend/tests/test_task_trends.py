@@ -0,0 +1,47 @@
+import asyncio
+from datetime import date, datetime, timezone
+import app.utils.task_trends as task_trends
+from app.utils.cache import TTLCache
+from app.utils.task_trends import WEEK, MONTH, bucket_start, bucket_starts, task_trend
+
+NOW = datetime(2026, 10, 16, 12, 0, tzinfo=timezone.utc)
+
+class FakeAsyncSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.ranges = []
+
+    async def execute(self, statement, params):
+        self.ranges.append((params["start"].date(), params["end"].date()))
+        return [row for row in self.rows if params["start"].replace(tzinfo=None) <= row[0] < params["end"].replace(tzinfo=None)]
+
+def test_buckets_align_with_date_trunc():
+    assert bucket_start(date(2026, 10, 16), WEEK) == date(2026, 10, 12)
+    assert bucket_start(date(2026, 10, 16), MONTH) == date(2026, 10, 1)
+    assert bucket_starts(date(2026, 11, 15), date(2027, 2, 1), MONTH) == [
+        date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)
+    ]
+
+def test_closed_buckets_are_cached_and_only_current_bucket_is_requeried(monkeypatch):
+    monkeypatch.setattr(task_trends, "task_trend_cache", TTLCache(maxsize=100, ttl=3600))
+    db = FakeAsyncSession([
+        (datetime(2026, 9, 28), "SEBI", "created", 2),
+        (datetime(2026, 9, 28), "SEBI", "overdue", 1),
+        (datetime(2026, 10, 12), "RBI", "completed", 3),
+    ])
+
+    async def scenario():
+        first = await task_trend(db, WEEK, date(2026, 9, 28), date(2026, 10, 17), now=NOW)
+        second = await task_trend(db, WEEK, date(2026, 9, 28), date(2026, 10, 17), now=NOW)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert list(first) == [date(2026, 9, 28), date(2026, 10, 5), date(2026, 10, 12)]
+    assert first[date(2026, 9, 28)]["SEBI"] == {"created": 2, "completed": 0, "overdue": 1}
+    assert first[date(2026, 10, 5)] == {}
+    assert second == first
+    assert db.ranges == [
+        (date(2026, 9, 28), date(2026, 10, 19)),
+        (date(2026, 10, 12), date(2026, 10, 19)),
+    ]
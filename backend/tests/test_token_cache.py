@@ -0,0 +1,56 @@
+import pytest
+import jwt
+import time
+from datetime import datetime, timedelta
+from app.auth.security import (
+    SECRET_KEY, ALGORITHM, create_access_token, decode_access_token, token_cache
+)
+from app.utils.cache import TTLCache
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+def test_repeat_token_is_served_from_cache():
+    token = create_access_token({"sub": "test@example.com", "role": "Fund Manager"}, timedelta(minutes=5))
+    before = token_cache.stats()
+
+    first = decode_access_token(token)
+    second = decode_access_token(token)
+
+    stats = token_cache.stats()
+    assert first == second
+    assert first["sub"] == "test@example.com"
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+def test_cache_entry_is_evicted_at_exp():
+    payload = {"sub": "test@example.com", "exp": datetime.utcnow() + timedelta(seconds=1)}
+    token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    decode_access_token(token)
+    assert len(token_cache) == 1
+
+    time.sleep(1.1)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_access_token(token)
+    assert token_cache.stats()["expirations"] == 1
+
+def test_invalid_token_is_not_cached():
+    token = jwt.encode({"sub": "test@example.com"}, "wrong-secret", algorithm=ALGORITHM)
+    with pytest.raises(jwt.PyJWTError):
+        decode_access_token(token)
+    assert len(token_cache) == 0
+
+def test_ttl_cache_is_bounded_lru():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import pytest
+from app.utils.worker_pool import BoundedWorkerPool, PoolSaturatedError
+from app.auth.security import get_password_hash, verify_password_async, get_password_hash_async
+
+def test_pool_rejects_jobs_beyond_queue_depth():
+    pool = BoundedWorkerPool(max_workers=1, max_queue=1, name="test")
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        queued = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(running, queued)
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["in_flight"] == 0
+    pool.shutdown()
+
+def test_event_loop_stays_responsive_during_bcrypt():
+    hashed = get_password_hash("testpassword")
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        results = await asyncio.gather(*[verify_password_async("testpassword", hashed) for _ in range(4)])
+        ticking.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(scenario())
+    assert all(results)
+    assert ticks > 0
+
+def test_async_hash_round_trip():
+    hashed = asyncio.run(get_password_hash_async("secret"))
+    assert asyncio.run(verify_password_async("secret", hashed))
+    assert not asyncio.run(verify_password_async("wrong", hashed))